@@ -1,20 +1,31 @@
 import streamlit as st
 import sys
 import os
-import matplotlib.pyplot as plt
+import pandas as pd
+import matplotlib
+
+# Render off-screen with Agg; the app only ever ships rasterized images
+matplotlib.use('Agg')
 
 # Add project root to path
 sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
 
-from src.io import load_data
-from src.standardize import rename_nypd_columns, rename_lapd_columns, clean_nypd_data, clean_lapd_data
+from src.io import load_data, save_dataframe_to_parquet, is_cache_valid, save_cache_metadata
+from src.aggregation import summarize_temporal, temporal_counts
+from src.standardize import (
+    rename_nypd_columns,
+    rename_lapd_columns,
+    clean_nypd_data,
+    clean_lapd_data,
+    NYPD_READ_OPTIONS,
+    LAPD_READ_OPTIONS
+)
 from src.data_processing import (
-    standardize_age_categories, 
-    standardize_gender, 
-    standardize_race_ethnicity, 
-    standardize_offense_categories,
+    standardize_all,
     create_aligned_datasets,
-    filter_datasets_by_year_range
+    filter_datasets_by_year_range,
+    sort_by_year,
+    slice_year_range
 )
 from src.visualization import (
     plot_crime_by_year, 
@@ -22,7 +33,8 @@ from src.visualization import (
     plot_crime_by_weekday,
     plot_crime_by_day_of_month,
     create_crime_density_comparison,
-    create_demographic_dashboard
+    create_demographic_dashboard,
+    get_figure_axes
 )
 
 st.set_page_config(page_title="Geospatial Data Analysis", layout="wide")
@@ -47,25 +59,58 @@ with st.expander("About this Project"):
     The datasets used in this analysis come from publicly available police arrest records from the NYPD and LAPD, standardized to allow for direct comparison.
     """)
 
-@st.cache_data
+# The frames are read-only after loading, so every session shares one
+# in-memory copy instead of unpickling its own
+@st.cache_resource
 def load_and_process_data():
     # Load data (using samples for demo speed if full data is large, but here we try full)
-    # In a real app, we might want to load pre-processed parquet files
+    # Parquet files are preferred over CSV since they skip the text parsing pass
     data_dir = os.path.join(os.path.dirname(__file__), '..', 'data')
-    nypd_path = os.path.join(data_dir, 'nypd_aligned.csv')
-    lapd_path = os.path.join(data_dir, 'lapd_aligned.csv')
-    
-    # Fallback to samples if full data not found
-    if not os.path.exists(nypd_path):
-        nypd_path = os.path.join(data_dir, 'sample_nypd.csv')
-    if not os.path.exists(lapd_path):
-        lapd_path = os.path.join(data_dir, 'sample_lapd.csv')
 
-    nypd_df = load_data(nypd_path)
-    lapd_df = load_data(lapd_path)
+    def find_data_file(*filenames):
+        for filename in filenames:
+            path = os.path.join(data_dir, filename)
+            if os.path.exists(path):
+                return path
+        return os.path.join(data_dir, filenames[-1])
+
+    # Fallback to samples if full data not found
+    nypd_path = find_data_file('nypd_aligned.parquet', 'nypd_aligned.csv',
+                               'sample_nypd.parquet', 'sample_nypd.csv')
+    lapd_path = find_data_file('lapd_aligned.parquet', 'lapd_aligned.csv',
+                               'sample_lapd.parquet', 'sample_lapd.csv')
+
+    # Processed output of a previous run, valid while the source files are unchanged
+    source_paths = [nypd_path, lapd_path]
+    cache_paths = [os.path.join(data_dir, filename) for filename in (
+        'nypd_processed.parquet', 'lapd_processed.parquet', 'nypd_summary.parquet', 'lapd_summary.parquet')]
+    cache_meta_path = os.path.join(data_dir, 'processed_cache.json')
+
+    def finalize(nypd_final, lapd_final):
+        # Year-sorted frames let the sidebar slider select rows by slicing, and
+        # the per-date summaries are all the temporal plots need
+        nypd_final, lapd_final = sort_by_year(nypd_final), sort_by_year(lapd_final)
+        return nypd_final, lapd_final, summarize_temporal(nypd_final), summarize_temporal(lapd_final)
+
+    if is_cache_valid(cache_meta_path, source_paths):
+        cached = [load_data(path) for path in cache_paths]
+        if all(df is not None for df in cached):
+            nypd_df, lapd_df, nypd_summary, lapd_summary = cached
+            # Saved in year order, so sort_by_year only checks the order
+            return sort_by_year(nypd_df), sort_by_year(lapd_df), nypd_summary, lapd_summary
+
+    def read_options(path, options):
+        # Raw CSV exports are read with an explicit schema; aligned files as-is
+        if not path.endswith('.csv') or not os.path.exists(path):
+            return {}
+        header = pd.read_csv(path, nrows=0).columns
+        return options if set(options['usecols']).issubset(header) else {}
+
+    nypd_df = load_data(nypd_path, **read_options(nypd_path, NYPD_READ_OPTIONS))
+    lapd_df = load_data(lapd_path, **read_options(lapd_path, LAPD_READ_OPTIONS))
 
     if nypd_df is None or lapd_df is None:
-        return None, None
+        return None, None, None, None
 
     # Check if data is already aligned (has standardized columns)
     # The aligned data contains 'Data_Source', 'Arrest_Year', 'Offense_Std', etc.
@@ -75,8 +120,7 @@ def load_and_process_data():
 
     if is_nypd_aligned and is_lapd_aligned:
         # Data is already processed, ensure year overlap
-        nypd_final, lapd_final = filter_datasets_by_year_range(nypd_df, lapd_df)
-        return nypd_final, lapd_final
+        return finalize(*filter_datasets_by_year_range(nypd_df, lapd_df))
 
     # Pipeline for raw data
     nypd_df = rename_nypd_columns(nypd_df)
@@ -85,18 +129,29 @@ def load_and_process_data():
     nypd_df = clean_nypd_data(nypd_df)
     lapd_df = clean_lapd_data(lapd_df)
     
-    nypd_df, lapd_df = standardize_age_categories(nypd_df, lapd_df)
-    nypd_df, lapd_df = standardize_gender(nypd_df, lapd_df)
-    nypd_df, lapd_df = standardize_race_ethnicity(nypd_df, lapd_df)
-    nypd_df, lapd_df = standardize_offense_categories(nypd_df, lapd_df)
+    # The cleaned frames are fresh copies, so standardize them in place
+    nypd_df, lapd_df = standardize_all(nypd_df, lapd_df, copy=False)
     
     nypd_aligned, lapd_aligned, _ = create_aligned_datasets(nypd_df, lapd_df)
-    nypd_final, lapd_final = filter_datasets_by_year_range(nypd_aligned, lapd_aligned)
+    processed = finalize(*filter_datasets_by_year_range(nypd_aligned, lapd_aligned))
+
+    # Persist the processed frames so the next cold start skips the pipeline
+    if all(df is not None for df in processed):
+        for df, path in zip(processed, cache_paths):
+            save_dataframe_to_parquet(df, path)
+        save_cache_metadata(cache_meta_path, source_paths)
     
-    return nypd_final, lapd_final
+    return processed
+
+def get_session_figure(key, figsize=(10, 6)):
+    # Reuse this session's Figure across reruns; only the axes contents are redrawn
+    figures = st.session_state.setdefault('figs', {})
+    fig, (ax,) = get_figure_axes(figures.get(key), 1, 1, figsize=figsize)
+    figures[key] = fig
+    return fig, ax
 
 with st.spinner('Loading and processing data...'):
-    nypd_df, lapd_df = load_and_process_data()
+    nypd_df, lapd_df, nypd_summary, lapd_summary = load_and_process_data()
 
 if nypd_df is None or lapd_df is None:
     st.error("Failed to load data.")
@@ -109,9 +164,11 @@ else:
     
     selected_years = st.sidebar.slider("Select Year Range", min_year, max_year, (min_year, max_year))
     
-    # Filter data
-    nypd_filtered = nypd_df[(nypd_df['Arrest_Year'] >= selected_years[0]) & (nypd_df['Arrest_Year'] <= selected_years[1])]
-    lapd_filtered = lapd_df[(lapd_df['Arrest_Year'] >= selected_years[0]) & (lapd_df['Arrest_Year'] <= selected_years[1])]
+    # Filter data (the cached frames are sorted by year, so this is a slice)
+    nypd_filtered = slice_year_range(nypd_df, *selected_years)
+    lapd_filtered = slice_year_range(lapd_df, *selected_years)
+    nypd_summary_filtered = slice_year_range(nypd_summary, *selected_years)
+    lapd_summary_filtered = slice_year_range(lapd_summary, *selected_years)
     
     st.metric("NYPD Arrests", f"{len(nypd_filtered):,}")
     st.metric("LAPD Arrests", f"{len(lapd_filtered):,}")
@@ -121,43 +178,47 @@ else:
     with tab1:
         st.subheader("Temporal Patterns")
         
+        # The temporal plots read the per-date summaries, not every arrest,
+        # and share one set of counts per department
+        nypd_counts = temporal_counts(nypd_summary_filtered)
+        lapd_counts = temporal_counts(lapd_summary_filtered)
         col1, col2 = st.columns(2)
         
         with col1:
             st.markdown("#### Yearly Trend")
-            fig_year, ax_year = plt.subplots(figsize=(10, 6))
-            plot_crime_by_year(nypd_filtered, lapd_filtered, ax_year, '#1f77b4', '#ff7f0e')
+            fig_year, ax_year = get_session_figure('year')
+            plot_crime_by_year(nypd_counts, lapd_counts, ax_year, '#1f77b4', '#ff7f0e')
             st.pyplot(fig_year)
             
         with col2:
             st.markdown("#### Monthly Seasonality")
-            fig_month, ax_month = plt.subplots(figsize=(10, 6))
-            plot_crime_by_month(nypd_filtered, lapd_filtered, ax_month, '#1f77b4', '#ff7f0e')
+            fig_month, ax_month = get_session_figure('month')
+            plot_crime_by_month(nypd_counts, lapd_counts, ax_month, '#1f77b4', '#ff7f0e')
             st.pyplot(fig_month)
 
         col3, col4 = st.columns(2)
 
         with col3:
             st.markdown("#### Day of Week")
-            fig_week, ax_week = plt.subplots(figsize=(10, 6))
-            plot_crime_by_weekday(nypd_filtered, lapd_filtered, ax_week, '#1f77b4', '#ff7f0e')
+            fig_week, ax_week = get_session_figure('week')
+            plot_crime_by_weekday(nypd_counts, lapd_counts, ax_week, '#1f77b4', '#ff7f0e')
             st.pyplot(fig_week)
 
         with col4:
             st.markdown("#### Day of Month")
-            fig_dom, ax_dom = plt.subplots(figsize=(10, 6))
-            plot_crime_by_day_of_month(nypd_filtered, lapd_filtered, ax_dom, '#1f77b4', '#ff7f0e')
+            fig_dom, ax_dom = get_session_figure('dom')
+            plot_crime_by_day_of_month(nypd_counts, lapd_counts, ax_dom, '#1f77b4', '#ff7f0e')
             st.pyplot(fig_dom)
 
     with tab2:
         st.subheader("Geospatial Analysis")
         st.markdown("Comparison of crime density between NYC and LA.")
         
-        # Sampling slider for map performance
-        sample_frac = st.slider("Map Sample Fraction", 0.001, 0.1, 0.01, format="%.3f")
-        
         with st.spinner("Generating maps..."):
-            fig_map = create_crime_density_comparison(nypd_filtered, lapd_filtered, sample_frac=sample_frac)
+            # Every arrest is aggregated into a fixed pixel grid, so no sampling is needed
+            figures = st.session_state.setdefault('figs', {})
+            fig_map = create_crime_density_comparison(nypd_filtered, lapd_filtered, fig=figures.get('map'))
+            figures['map'] = fig_map
             st.pyplot(fig_map)
 
     with tab3:
@@ -165,7 +226,9 @@ else:
         st.markdown("Comparison of arrest demographics (Race, Gender, Age, Offense).")
         
         with st.spinner("Generating demographic dashboard..."):
-            fig_demo = create_demographic_dashboard(nypd_filtered, lapd_filtered)
+            figures = st.session_state.setdefault('figs', {})
+            fig_demo = create_demographic_dashboard(nypd_filtered, lapd_filtered, fig=figures.get('demo'))
+            figures['demo'] = fig_demo
             st.pyplot(fig_demo)
 
     with tab4:
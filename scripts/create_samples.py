@@ -1,11 +1,29 @@
 import pandas as pd
 import os
+import sys
+
+# Add project root to path
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from src.io import save_dataframe_to_parquet
+
+def parquet_path_for(csv_path):
+    return os.path.splitext(csv_path)[0] + '.parquet'
+
+def convert_to_parquet(input_path):
+    try:
+        # One-time conversion so the app can skip CSV parsing on cold start
+        df = pd.read_csv(input_path, low_memory=False)
+        save_dataframe_to_parquet(df, parquet_path_for(input_path))
+    except Exception as e:
+        print(f"Error converting {input_path} to Parquet: {e}")
 
 def create_sample(input_path, output_path, n=5000):
     try:
         # Read only the first n rows
         df = pd.read_csv(input_path, nrows=n, low_memory=False)
         df.to_csv(output_path, index=False)
+        save_dataframe_to_parquet(df, parquet_path_for(output_path))
         print(f"Successfully created {output_path} with {len(df)} rows.")
     except Exception as e:
         print(f"Error creating sample for {input_path}: {e}")
@@ -19,6 +37,10 @@ def main():
     sample_lapd_path = os.path.join(data_dir, 'sample_lapd.csv')
     sample_nypd_path = os.path.join(data_dir, 'sample_nypd.csv')
     
+    print("Converting aligned datasets to Parquet...")
+    convert_to_parquet(lapd_path)
+    convert_to_parquet(nypd_path)
+
     print("Creating sample datasets...")
     create_sample(lapd_path, sample_lapd_path)
     create_sample(nypd_path, sample_nypd_path)
@@ -0,0 +1,158 @@
+import numpy as np
+import pandas as pd
+
+try:
+    from numba import get_num_threads, njit, prange
+    HAVE_NUMBA = True
+except ImportError:  # numba is optional, see the 'fast' extra
+    HAVE_NUMBA = False
+
+# Below this many keys the thread start-up cost outweighs the parallel count
+PARALLEL_COUNT_THRESHOLD = 100_000
+# Above this many buckets the per-thread count rows cost more memory than the
+# parallel count saves, e.g. for pixel grids
+PARALLEL_MAX_BUCKETS = 1 << 16
+
+DAYS_IN_MONTH = np.array([31, 28, 31, 30, 31, 30, 31, 31, 30, 31, 30, 31])
+# Sakamoto's per-month offsets for the weekday of a date (Sunday=0)
+SAKAMOTO_MONTH_OFFSETS = np.array([0, 3, 2, 5, 0, 3, 5, 1, 4, 6, 2, 4])
+
+if HAVE_NUMBA:
+    @njit(cache=True, parallel=True)
+    def _count_by_key_parallel(keys, n_buckets, n_threads):
+        # Each thread counts its own slice into a private row, merged at the end
+        chunk = (len(keys) + n_threads - 1) // n_threads
+        local_counts = np.zeros((n_threads, n_buckets), dtype=np.int64)
+        for t in prange(n_threads):
+            for i in range(t * chunk, min((t + 1) * chunk, len(keys))):
+                key = keys[i]
+                if 0 <= key < n_buckets:
+                    local_counts[t, key] += 1
+        return local_counts.sum(axis=0)
+
+    @njit(cache=True, parallel=True)
+    def _grid_keys_parallel(x, y, x_min, x_max, y_min, y_max, nx, ny):
+        # Flat cell index per point, or -1 for points outside the grid (NaN fails
+        # every comparison); the upper edges belong to the last cell
+        keys = np.empty(len(x), dtype=np.int64)
+        x_scale = nx / (x_max - x_min)
+        y_scale = ny / (y_max - y_min)
+        for i in prange(len(x)):
+            if x_min <= x[i] <= x_max and y_min <= y[i] <= y_max:
+                ix = min(int((x[i] - x_min) * x_scale), nx - 1)
+                iy = min(int((y[i] - y_min) * y_scale), ny - 1)
+                keys[i] = ix * ny + iy
+            else:
+                keys[i] = -1
+        return keys
+
+def count_by_key(keys: np.ndarray, n_buckets: int, weights: np.ndarray | None = None) -> np.ndarray:
+    """
+    Count occurrences of each integer key in [0, n_buckets).
+    Keys outside that range and missing (NaN) keys are ignored. With `weights`,
+    each key adds its weight instead of one, e.g. the counts of a summary table.
+    Uses a parallel Numba kernel when numba is installed and the input is large enough.
+    """
+    keys = np.asarray(keys)
+    if keys.dtype.kind not in 'iu':
+        keys = np.nan_to_num(keys.astype(np.float64), nan=-1).astype(np.int64)
+
+    if (weights is None and HAVE_NUMBA and len(keys) >= PARALLEL_COUNT_THRESHOLD
+            and n_buckets <= PARALLEL_MAX_BUCKETS):
+        return _count_by_key_parallel(keys, n_buckets, get_num_threads())
+
+    in_range = (keys >= 0) & (keys < n_buckets)
+    if weights is None:
+        return np.bincount(keys[in_range], minlength=n_buckets)[:n_buckets]
+
+    weights = np.asarray(weights, dtype=np.float64)[in_range]
+    return np.bincount(keys[in_range], weights=weights, minlength=n_buckets)[:n_buckets].astype(np.int64)
+
+def count_points_2d(x: np.ndarray, y: np.ndarray, x_range: tuple[float, float],
+                    y_range: tuple[float, float], bins: tuple[int, int]) -> np.ndarray:
+    """
+    Count points on a regular bins=(nx, ny) grid over x_range by y_range.
+    Equivalent to np.histogram2d(x, y, bins, range=[x_range, y_range])[0], but
+    computes each point's cell directly (in a parallel Numba kernel when numba is
+    installed) instead of searching the bin edges.
+    """
+    nx, ny = bins
+    (x_min, x_max), (y_min, y_max) = x_range, y_range
+    # Float inputs keep their precision (e.g. float32 coordinates) to avoid a copy
+    x, y = (part if part.dtype.kind == 'f' else part.astype(np.float64)
+            for part in (np.asarray(x), np.asarray(y)))
+
+    if HAVE_NUMBA and len(x) >= PARALLEL_COUNT_THRESHOLD:
+        keys = _grid_keys_parallel(x, y, x_min, x_max, y_min, y_max, nx, ny)
+    else:
+        inside = (x >= x_min) & (x <= x_max) & (y >= y_min) & (y <= y_max)
+        ix = np.minimum(((x[inside] - x_min) * (nx / (x_max - x_min))).astype(np.int64), nx - 1)
+        iy = np.minimum(((y[inside] - y_min) * (ny / (y_max - y_min))).astype(np.int64), ny - 1)
+        keys = ix * ny + iy
+
+    return count_by_key(keys, nx * ny).reshape(nx, ny)
+
+def summarize_temporal(df: pd.DataFrame) -> pd.DataFrame | None:
+    """
+    Collapse a dataset to one row per arrest date with its number of arrests.
+    The temporal plots accept this summary in place of the full dataset and
+    weight each date by its Arrest_Count. Rows are ordered by date.
+    """
+    if df is None:
+        return None
+
+    date_columns = ['Arrest_Year', 'Arrest_Month', 'Arrest_Day']
+    return df.groupby(date_columns, sort=True).size().reset_index(name='Arrest_Count')
+
+def day_of_week(years: np.ndarray, months: np.ndarray, days: np.ndarray) -> np.ndarray:
+    """
+    Weekday (Monday=0 ... Sunday=6) of each year/month/day triple, computed with
+    Sakamoto's algorithm in integer arithmetic instead of building timestamps.
+    Missing or impossible dates (e.g. February 30) get -1, which count_by_key ignores.
+    """
+    years, months, days = (np.asarray(part, dtype=np.float64) for part in (years, months, days))
+    valid = (years >= 1) & (years < 10_000) & (months >= 1) & (months <= 12) & (days >= 1)
+    years, months, days = (np.where(valid, part, 1).astype(np.int64) for part in (years, months, days))
+
+    is_leap = (years % 4 == 0) & ((years % 100 != 0) | (years % 400 == 0))
+    valid &= days <= DAYS_IN_MONTH[months - 1] + (is_leap & (months == 2))
+
+    # January and February count as months of the previous year
+    years = years - (months < 3)
+    sunday_based = (years + years // 4 - years // 100 + years // 400
+                    + SAKAMOTO_MONTH_OFFSETS[months - 1] + days) % 7
+    return np.where(valid, (sunday_based + 6) % 7, -1)
+
+def get_arrest_weights(df: pd.DataFrame) -> np.ndarray | None:
+    """
+    Per-row arrest counts of a summarize_temporal table, or None for a full
+    dataset where every row is one arrest.
+    """
+    return df['Arrest_Count'].to_numpy() if 'Arrest_Count' in df.columns else None
+
+def temporal_counts(df: pd.DataFrame | dict) -> dict:
+    """
+    Arrest counts of a dataset (or its summarize_temporal table) by year, month,
+    day of month and weekday, shared by all temporal plots so each column is
+    scanned once. `year` counts start at `first_year`; `month` and `day` start
+    at 1 and `weekday` at Monday. An already computed dict is returned as is.
+    """
+    if isinstance(df, dict):
+        return df
+
+    weights = get_arrest_weights(df)
+    years, months, days = (df[column].to_numpy(dtype='float64', na_value=np.nan)
+                           for column in ['Arrest_Year', 'Arrest_Month', 'Arrest_Day'])
+
+    known_years = years[~np.isnan(years)]
+    first_year = int(known_years.min()) if len(known_years) else 0
+    n_years = int(known_years.max()) - first_year + 1 if len(known_years) else 0
+
+    return {
+        'first_year': first_year,
+        'year': count_by_key(years - first_year, n_years, weights),
+        # Bucket 0 catches nothing valid, so months 1-12 and days 1-31 are all present
+        'month': count_by_key(months, 13, weights)[1:],
+        'day': count_by_key(days, 32, weights)[1:],
+        'weekday': count_by_key(day_of_week(years, months, days), 7, weights),
+    }
@@ -1,81 +1,111 @@
+import re
 import pandas as pd
 import numpy as np
-from src.standardize import convert_numeric_age_to_category
 
-def standardize_age_categories(nypd_df: pd.DataFrame, lapd_df: pd.DataFrame) -> tuple[pd.DataFrame, pd.DataFrame]:
+try:
+    import pyarrow as pa
+    import pyarrow.compute as pc
+except ImportError:  # falls back to the pandas regex path
+    pc = None
+
+# Lookup tables for the code-to-label standardizations, built once at import.
+# Mapping through a categorical Series yields categorical output directly.
+GENDER_DTYPE = pd.CategoricalDtype(['Male', 'Female', 'Unknown'])
+RACE_DTYPE = pd.CategoricalDtype([
+    'Black', 'White', 'Hispanic', 'Asian/Pacific Islander',
+    'Native American', 'Other', 'Unknown'
+])
+AGE_DTYPE = pd.CategoricalDtype(['<18', '18-24', '25-44', '45-64', '65+', 'UNKNOWN'])
+OFFENSE_DTYPE = pd.CategoricalDtype([
+    'Violent Crime', 'Property Crime', 'Drug Offense',
+    'Weapon Offense', 'Traffic Violation', 'Other'
+])
+
+NYPD_GENDER_MAP = pd.Series({'M': 'Male', 'F': 'Female', 'U': 'Unknown'}, dtype=GENDER_DTYPE)
+LAPD_GENDER_MAP = pd.Series({'M': 'Male', 'F': 'Female', 'X': 'Unknown'}, dtype=GENDER_DTYPE)
+
+NYPD_RACE_MAP = pd.Series({
+    'BLACK': 'Black',
+    'WHITE': 'White',
+    'WHITE HISPANIC': 'Hispanic',
+    'BLACK HISPANIC': 'Hispanic',
+    'ASIAN / PACIFIC ISLANDER': 'Asian/Pacific Islander',
+    'AMERICAN INDIAN/ALASKAN NATIVE': 'Native American',
+    'UNKNOWN': 'Unknown'
+}, dtype=RACE_DTYPE)
+
+LAPD_RACE_MAP = pd.Series({
+    'H': 'Hispanic', 'B': 'Black', 'W': 'White',
+    'A': 'Asian/Pacific Islander', 'C': 'Asian/Pacific Islander',
+    'J': 'Asian/Pacific Islander', 'K': 'Asian/Pacific Islander',
+    'L': 'Asian/Pacific Islander', 'V': 'Asian/Pacific Islander',
+    'F': 'Asian/Pacific Islander', 'D': 'Asian/Pacific Islander',
+    'I': 'Native American', 'O': 'Other', 'X': 'Unknown', 'Z': 'Unknown'
+}, dtype=RACE_DTYPE)
+
+def standardize_age_categories(nypd_df: pd.DataFrame, lapd_df: pd.DataFrame, copy: bool = True) -> tuple[pd.DataFrame, pd.DataFrame]:
     """
     Standardize age categories across both datasets using NYPD age categories as standard.
+    Pass copy=False to update the input frames in place.
     """
-    nypd = nypd_df.copy() if nypd_df is not None else None
-    lapd = lapd_df.copy() if lapd_df is not None else None
-    
-    standard_categories = ['<18', '18-24', '25-44', '45-64', '65+', 'UNKNOWN']
+    nypd = nypd_df.copy() if copy and nypd_df is not None else nypd_df
+    lapd = lapd_df.copy() if copy and lapd_df is not None else lapd_df
 
     if nypd is not None:
-        valid_age_mask = nypd['Age_Group'].isin(standard_categories)
-        nypd.loc[~valid_age_mask, 'Age_Group'] = 'UNKNOWN'
+        valid_age_mask = nypd['Age_Group'].isin(AGE_DTYPE.categories)
+        age_group = nypd['Age_Group'].astype(object).where(valid_age_mask, 'UNKNOWN')
+        nypd['Age_Group'] = age_group.astype(AGE_DTYPE)
         nypd['Age_Category_Std'] = nypd['Age_Group']
 
     if lapd is not None:
-        lapd['Age_Category_Std'] = lapd['Age'].apply(convert_numeric_age_to_category)
+        # Vectorized equivalent of convert_numeric_age_to_category
+        age_bins = [-np.inf, 18, 25, 45, 65, np.inf]
+        age_labels = ['<18', '18-24', '25-44', '45-64', '65+']
+        age_groups = pd.cut(lapd['Age'], bins=age_bins, labels=age_labels, right=False)
+        valid_age_mask = lapd['Age'].notna() & (lapd['Age'] >= 0)
+        lapd['Age_Category_Std'] = age_groups.astype(object).where(valid_age_mask, 'UNKNOWN').astype(AGE_DTYPE)
 
     return nypd, lapd
 
-def standardize_gender(nypd_df: pd.DataFrame, lapd_df: pd.DataFrame) -> tuple[pd.DataFrame, pd.DataFrame]:
+def standardize_gender(nypd_df: pd.DataFrame, lapd_df: pd.DataFrame, copy: bool = True) -> tuple[pd.DataFrame, pd.DataFrame]:
     """
     Standardize gender/sex columns across both datasets.
+    Pass copy=False to update the input frames in place.
     """
-    nypd = nypd_df.copy() if nypd_df is not None else None
-    lapd = lapd_df.copy() if lapd_df is not None else None
+    nypd = nypd_df.copy() if copy and nypd_df is not None else nypd_df
+    lapd = lapd_df.copy() if copy and lapd_df is not None else lapd_df
 
     if nypd is not None:
-        gender_map = {'M': 'Male', 'F': 'Female', 'U': 'Unknown'}
-        nypd['Gender_Std'] = nypd['Perp_Sex'].map(gender_map).fillna('Unknown')
+        nypd['Gender_Std'] = nypd['Perp_Sex'].map(NYPD_GENDER_MAP).fillna('Unknown')
 
     if lapd is not None:
-        gender_map = {'M': 'Male', 'F': 'Female', 'X': 'Unknown'}
-        lapd['Gender_Std'] = lapd['Perp_Sex_Code'].map(gender_map).fillna('Unknown')
+        lapd['Gender_Std'] = lapd['Perp_Sex_Code'].map(LAPD_GENDER_MAP).fillna('Unknown')
 
     return nypd, lapd
 
-def standardize_race_ethnicity(nypd_df: pd.DataFrame, lapd_df: pd.DataFrame) -> tuple[pd.DataFrame, pd.DataFrame]:
+def standardize_race_ethnicity(nypd_df: pd.DataFrame, lapd_df: pd.DataFrame, copy: bool = True) -> tuple[pd.DataFrame, pd.DataFrame]:
     """
     Standardize race and ethnicity columns across both datasets.
+    Pass copy=False to update the input frames in place.
     """
-    nypd = nypd_df.copy() if nypd_df is not None else None
-    lapd = lapd_df.copy() if lapd_df is not None else None
+    nypd = nypd_df.copy() if copy and nypd_df is not None else nypd_df
+    lapd = lapd_df.copy() if copy and lapd_df is not None else lapd_df
 
     if nypd is not None:
-        race_map = {
-            'BLACK': 'Black',
-            'WHITE': 'White',
-            'WHITE HISPANIC': 'Hispanic',
-            'BLACK HISPANIC': 'Hispanic',
-            'ASIAN / PACIFIC ISLANDER': 'Asian/Pacific Islander',
-            'AMERICAN INDIAN/ALASKAN NATIVE': 'Native American',
-            'UNKNOWN': 'Unknown'
-        }
-        nypd['Race_Std'] = nypd['Perp_Race'].map(race_map).fillna('Unknown')
+        nypd['Race_Std'] = nypd['Perp_Race'].map(NYPD_RACE_MAP).fillna('Unknown')
 
     if lapd is not None:
-        race_map = {
-            'H': 'Hispanic', 'B': 'Black', 'W': 'White',
-            'A': 'Asian/Pacific Islander', 'C': 'Asian/Pacific Islander',
-            'J': 'Asian/Pacific Islander', 'K': 'Asian/Pacific Islander',
-            'L': 'Asian/Pacific Islander', 'V': 'Asian/Pacific Islander',
-            'F': 'Asian/Pacific Islander', 'D': 'Asian/Pacific Islander',
-            'I': 'Native American', 'O': 'Other', 'X': 'Unknown', 'Z': 'Unknown'
-        }
-        lapd['Race_Std'] = lapd['Perp_Descent_Code'].map(race_map).fillna('Unknown')
+        lapd['Race_Std'] = lapd['Perp_Descent_Code'].map(LAPD_RACE_MAP).fillna('Unknown')
 
     return nypd, lapd
 
-def standardize_offense_categories(nypd_df: pd.DataFrame, lapd_df: pd.DataFrame) -> tuple[pd.DataFrame, pd.DataFrame]:
+def standardize_offense_categories(nypd_df: pd.DataFrame, lapd_df: pd.DataFrame, copy: bool = True) -> tuple[pd.DataFrame, pd.DataFrame]:
     """
     Create standardized offense categories across both datasets.
+    Pass copy=False to update the input frames in place.
     """
-    nypd = nypd_df.copy() if nypd_df is not None else None
-    lapd = lapd_df.copy() if lapd_df is not None else None
+    nypd = nypd_df.copy() if copy and nypd_df is not None else nypd_df
+    lapd = lapd_df.copy() if copy and lapd_df is not None else lapd_df
 
     offense_map_nypd = {
         'ROBBERY': 'Violent Crime', 'ASSAULT': 'Violent Crime',
@@ -91,13 +121,50 @@ def standardize_offense_categories(nypd_df: pd.DataFrame, lapd_df: pd.DataFrame)
         'TRAFFIC': 'Traffic Violation',
     }
 
+    def categorize(descriptions, offense_map):
+        if pc is not None:
+            # Match each keyword in Arrow's kernels; Arrow-backed columns (the
+            # pyarrow CSV reader's output) convert without copying
+            arr = pa.array(descriptions.astype('string[pyarrow]'))
+            conditions = [
+                pc.match_substring(arr, keyword, ignore_case=True).fill_null(False)
+                .to_numpy(zero_copy_only=False)
+                for keyword in offense_map
+            ]
+            # np.select keeps the first true condition, i.e. the first keyword in dict order
+            labels = np.select(conditions, list(offense_map.values()), default='Other')
+            return pd.Series(labels, index=descriptions.index, dtype=OFFENSE_DTYPE)
+
+        # One lookahead per keyword, tried in dict order, so the first keyword
+        # contained anywhere in the description wins
+        pattern = '^(?:' + '|'.join(f'(?=.*?({re.escape(k)}))' for k in offense_map) + ')'
+        matches = descriptions.astype('string').str.upper().str.extract(pattern)
+        hits = matches.notna().to_numpy()
+        # Rows without any match index the trailing 'Other'
+        categories = np.array(list(offense_map.values()) + ['Other'])
+        first_hit = np.where(hits.any(axis=1), hits.argmax(axis=1), len(offense_map))
+        return pd.Series(categories[first_hit], index=descriptions.index, dtype=OFFENSE_DTYPE)
+
     if nypd is not None:
-        nypd['Offense_Std'] = nypd['Offense_Category'].map(lambda x: 
-            next((v for k, v in offense_map_nypd.items() if k in str(x).upper()), 'Other'))
+        nypd['Offense_Std'] = categorize(nypd['Offense_Category'], offense_map_nypd)
 
     if lapd is not None:
-        lapd['Offense_Std'] = lapd['Charge_Group_Description'].map(lambda x: 
-            next((v for k, v in offense_map_lapd.items() if k in str(x).upper()), 'Other'))
+        lapd['Offense_Std'] = categorize(lapd['Charge_Group_Description'], offense_map_lapd)
+
+    return nypd, lapd
+
+def standardize_all(nypd_df: pd.DataFrame, lapd_df: pd.DataFrame, copy: bool = True) -> tuple[pd.DataFrame, pd.DataFrame]:
+    """
+    Add all standardized columns (age, gender, race, offense) in one pass.
+    The frames are copied at most once up front and every step then writes
+    into them directly. Pass copy=False to update the input frames in place.
+    """
+    nypd = nypd_df.copy() if copy and nypd_df is not None else nypd_df
+    lapd = lapd_df.copy() if copy and lapd_df is not None else lapd_df
+
+    for standardize in (standardize_age_categories, standardize_gender,
+                        standardize_race_ethnicity, standardize_offense_categories):
+        nypd, lapd = standardize(nypd, lapd, copy=False)
 
     return nypd, lapd
 
@@ -117,12 +184,9 @@ def create_aligned_datasets(nypd_df: pd.DataFrame, lapd_df: pd.DataFrame) -> tup
         'Latitude', 'Longitude'
     ]
 
-    def get_aligned_df(df, cols):
-        data = {col: df[col] if col in df.columns else np.nan for col in cols}
-        return pd.DataFrame(data)
-
-    nypd_aligned = get_aligned_df(nypd_df, common_columns)
-    lapd_aligned = get_aligned_df(lapd_df, common_columns)
+    # reindex keeps the dtypes of present columns and fills absent ones with NaN
+    nypd_aligned = nypd_df.reindex(columns=common_columns)
+    lapd_aligned = lapd_df.reindex(columns=common_columns)
 
     return nypd_aligned, lapd_aligned, common_columns
 
@@ -136,15 +200,72 @@ def filter_datasets_by_year_range(nypd_df: pd.DataFrame, lapd_df: pd.DataFrame)
     if 'Arrest_Year' not in nypd_df.columns or 'Arrest_Year' not in lapd_df.columns:
         return nypd_df, lapd_df
 
-    nypd_years = {y for y in nypd_df['Arrest_Year'].unique() if pd.notna(y) and y > 1900}
-    lapd_years = {y for y in lapd_df['Arrest_Year'].unique() if pd.notna(y) and y > 1900}
-    
-    overlapping_years = nypd_years.intersection(lapd_years)
+    nypd_years = nypd_df['Arrest_Year']
+    lapd_years = lapd_df['Arrest_Year']
 
-    if not overlapping_years:
+    # Span shared by the plausible years of both datasets; NaN never compares true
+    nypd_valid = nypd_years[nypd_years > 1900]
+    lapd_valid = lapd_years[lapd_years > 1900]
+
+    if nypd_valid.empty or lapd_valid.empty:
+        return nypd_df, lapd_df
+
+    first_year = max(nypd_valid.min(), lapd_valid.min())
+    last_year = min(nypd_valid.max(), lapd_valid.max())
+
+    if first_year > last_year:
+        return nypd_df, lapd_df
+
+    nypd_mask = nypd_years.between(first_year, last_year)
+    lapd_mask = lapd_years.between(first_year, last_year)
+
+    # Years missing from either dataset inside the span are not overlapping
+    span = int(last_year - first_year) + 1
+    nypd_seen = np.bincount((nypd_years[nypd_mask] - first_year).astype(int), minlength=span) > 0
+    lapd_seen = np.bincount((lapd_years[lapd_mask] - first_year).astype(int), minlength=span) > 0
+    overlapping = nypd_seen & lapd_seen
+
+    if not overlapping.any():
         return nypd_df, lapd_df
 
-    nypd_filtered = nypd_df[nypd_df['Arrest_Year'].isin(overlapping_years)].copy()
-    lapd_filtered = lapd_df[lapd_df['Arrest_Year'].isin(overlapping_years)].copy()
+    if not overlapping.all():
+        overlapping_years = first_year + np.flatnonzero(overlapping)
+        nypd_mask &= nypd_years.isin(overlapping_years)
+        lapd_mask &= lapd_years.isin(overlapping_years)
+
+    nypd_filtered = nypd_df[nypd_mask].copy()
+    lapd_filtered = lapd_df[lapd_mask].copy()
 
     return nypd_filtered, lapd_filtered
+
+def sort_by_year(df: pd.DataFrame) -> pd.DataFrame:
+    """
+    Order a dataset by Arrest_Year (missing years last) so year ranges can be
+    taken with slice_year_range.
+    """
+    if df is None or 'Arrest_Year' not in df.columns:
+        return df
+
+    # Frames read back from the cache are already in order; skip the full reorder
+    years = df['Arrest_Year']
+    known_years = years.iloc[:len(years) - years.isna().sum()]
+    if known_years.notna().all() and known_years.is_monotonic_increasing:
+        return df
+    return df.sort_values('Arrest_Year', kind='stable', na_position='last')
+
+def slice_year_range(df: pd.DataFrame, start_year: int, end_year: int) -> pd.DataFrame:
+    """
+    Select the records of a year-sorted dataset from start_year to end_year inclusive.
+    The bounds are found by binary search, so the result is a positional slice
+    instead of a boolean-mask gather over every column. The search runs on
+    the column's own values, without converting them on every call.
+    """
+    years = df['Arrest_Year']
+    # Missing years are sorted last, outside of any range; without them the
+    # values convert to a NumPy view of their own dtype (e.g. int16)
+    known_years = years.iloc[:len(years) - years.isna().sum()].to_numpy()
+    # Bounds of the same dtype, as a Python int would upcast the whole array
+    bounds = np.array([start_year, end_year], dtype=known_years.dtype)
+    start = np.searchsorted(known_years, bounds[0], side='left')
+    end = np.searchsorted(known_years, bounds[1], side='right')
+    return df.iloc[start:end]
@@ -1,18 +1,64 @@
 import pandas as pd
+import pyarrow as pa
+import json
 import os
 
-def load_data(filepath: str) -> pd.DataFrame | None:
+# Version of the processed-data schema recorded in cache sidecars; bump it whenever
+# the pipeline changes the cached frames (columns, dtypes or categories)
+CACHE_SCHEMA_VERSION = 2
+
+def load_data(filepath: str, usecols: list[str] | None = None, dtype: dict[str, str] | None = None,
+              parse_dates: list[str] | None = None) -> pd.DataFrame | None:
     """
-    Load data from CSV files with robust error handling.
+    Load data from Parquet or CSV files with robust error handling.
+
+    A Parquet file is preferred when `filepath` points to one or when a
+    sibling `.parquet` file with the same name exists; otherwise the CSV
+    file is parsed. Parquet files are already typed, so the read options
+    only apply to CSV files.
     
     Args:
-        filepath (str): Path to the CSV file.
+        filepath (str): Path to the Parquet or CSV file.
+        usecols (list[str] | None): CSV columns to read; all columns if None.
+        dtype (dict[str, str] | None): Explicit dtypes for CSV columns.
+        parse_dates (list[str] | None): CSV columns to parse as datetimes.
         
     Returns:
         pd.DataFrame | None: Loaded DataFrame or None if loading failed.
     """
+    parquet_path = os.path.splitext(filepath)[0] + '.parquet'
+    if filepath.endswith('.parquet') or os.path.exists(parquet_path):
+        filepath = parquet_path
+
     try:
-        df = pd.read_csv(filepath, low_memory=False)
+        if filepath.endswith('.parquet'):
+            # Arrow-backed columns skip the conversion to NumPy/object arrays; the
+            # snappy-compressed pages are still decompressed into private buffers
+            df = pd.read_parquet(filepath, engine='pyarrow', dtype_backend='pyarrow')
+            # Saved categoricals come back as Arrow dictionaries; restore them with
+            # their stored categories as plain labels, so they compare equal to the
+            # canonical dtypes (e.g. RACE_DTYPE) and keep the code-based fast paths
+            dictionary_columns = [column for column, column_dtype in df.dtypes.items()
+                                  if isinstance(column_dtype, pd.ArrowDtype)
+                                  and pa.types.is_dictionary(column_dtype.pyarrow_dtype)]
+            for column in dictionary_columns:
+                values = pa.array(df[column].array)
+                if isinstance(values, pa.ChunkedArray):  # one chunk per row group
+                    values = values.unify_dictionaries().combine_chunks()
+                categories = pd.CategoricalDtype(values.dictionary.to_pylist())
+                codes = values.indices.fill_null(-1).to_numpy()
+                df[column] = pd.Categorical.from_codes(codes, dtype=categories)
+        else:
+            # Multithreaded parse straight into Arrow-backed columns
+            df = pd.read_csv(filepath, engine='pyarrow', dtype_backend='pyarrow', usecols=usecols,
+                             dtype=dtype, parse_dates=parse_dates)
+            # Without an explicit dtype an all-empty column is typed as null,
+            # which cannot hold fill values such as 'Not Specified'
+            null_columns = [column for column, column_dtype in df.dtypes.items()
+                            if isinstance(column_dtype, pd.ArrowDtype)
+                            and pa.types.is_null(column_dtype.pyarrow_dtype)]
+            if null_columns:
+                df = df.astype({column: 'string[pyarrow]' for column in null_columns})
         print(f"Data successfully loaded from {filepath}")
         return df
     except FileNotFoundError:
@@ -43,3 +89,78 @@ def save_dataframe_to_csv(df: pd.DataFrame, filename: str) -> None:
         print(f"FileNotFoundError: Directory for '{filename}' not found.")
     except Exception as e:
         print(f"An unexpected error occurred while saving '{filename}': {e}")
+
+def save_dataframe_to_parquet(df: pd.DataFrame, filename: str) -> None:
+    """
+    Save a pandas DataFrame to a snappy-compressed Parquet file with error handling.
+    
+    Args:
+        df (pd.DataFrame): DataFrame to save.
+        filename (str): Destination file path.
+    """
+    try:
+        df.to_parquet(filename, engine='pyarrow', compression='snappy', index=False)
+        print("\n--- Saving Progress ---")
+        print(f"Done! The progress saved here: '{filename}'.")
+    except PermissionError:
+        print(f"PermissionError: Unable to save '{filename}'. Please close the file if it's open and try again.")
+    except FileNotFoundError:
+        print(f"FileNotFoundError: Directory for '{filename}' not found.")
+    except Exception as e:
+        print(f"An unexpected error occurred while saving '{filename}': {e}")
+
+def get_file_fingerprint(paths: list[str]) -> dict[str, float]:
+    """
+    Fingerprint source files by their modification times.
+    
+    Args:
+        paths (list[str]): Source file paths; missing files are skipped.
+        
+    Returns:
+        dict[str, float]: Mapping of file name to modification time.
+    """
+    return {os.path.basename(path): os.path.getmtime(path) for path in paths if os.path.exists(path)}
+
+def get_cache_metadata(source_paths: list[str]) -> dict:
+    """
+    Build the contents of a cache sidecar file.
+    
+    Args:
+        source_paths (list[str]): Files the cached data was derived from.
+        
+    Returns:
+        dict: The pipeline schema version and the source file fingerprint.
+    """
+    return {'schema_version': CACHE_SCHEMA_VERSION, 'sources': get_file_fingerprint(source_paths)}
+
+def is_cache_valid(meta_path: str, source_paths: list[str]) -> bool:
+    """
+    Check whether a cache sidecar file matches the current pipeline and source files.
+    
+    Args:
+        meta_path (str): Path to the JSON sidecar written with the cache.
+        source_paths (list[str]): Files the cached data was derived from.
+        
+    Returns:
+        bool: True if the sidecar exists and neither the schema version nor
+            the sources have changed.
+    """
+    try:
+        with open(meta_path) as f:
+            return json.load(f) == get_cache_metadata(source_paths)
+    except (FileNotFoundError, json.JSONDecodeError):
+        return False
+
+def save_cache_metadata(meta_path: str, source_paths: list[str]) -> None:
+    """
+    Write the JSON sidecar that ties a cache to its source files.
+    
+    Args:
+        meta_path (str): Destination path of the sidecar file.
+        source_paths (list[str]): Files the cached data was derived from.
+    """
+    try:
+        with open(meta_path, 'w') as f:
+            json.dump(get_cache_metadata(source_paths), f, indent=2)
+    except Exception as e:
+        print(f"An unexpected error occurred while saving '{meta_path}': {e}")
@@ -1,6 +1,45 @@
 import pandas as pd
 import numpy as np
 
+# Raw export columns used by the cleaning and standardization steps, with
+# compact dtypes for the numeric codes and the arrest date parsed on load.
+# Text columns are read as Arrow-backed strings, also when a column is all empty
+NYPD_READ_OPTIONS = {
+    'usecols': [
+        'ARREST_KEY', 'ARREST_DATE', 'PD_CD', 'PD_DESC', 'KY_CD', 'OFNS_DESC',
+        'LAW_CODE', 'LAW_CAT_CD', 'ARREST_BORO', 'AGE_GROUP', 'PERP_SEX',
+        'PERP_RACE', 'X_COORD_CD', 'Y_COORD_CD', 'Latitude', 'Longitude'
+    ],
+    'dtype': {
+        'PD_CD': 'float32', 'KY_CD': 'float32',
+        'PD_DESC': 'string[pyarrow]', 'OFNS_DESC': 'string[pyarrow]',
+        'LAW_CODE': 'string[pyarrow]', 'LAW_CAT_CD': 'string[pyarrow]',
+        'ARREST_BORO': 'string[pyarrow]', 'AGE_GROUP': 'string[pyarrow]',
+        'PERP_SEX': 'string[pyarrow]', 'PERP_RACE': 'string[pyarrow]'
+    },
+    'parse_dates': ['ARREST_DATE']
+}
+
+LAPD_READ_OPTIONS = {
+    'usecols': [
+        'Report ID', 'Arrest Date', 'Time', 'Age', 'Sex Code', 'Descent Code',
+        'Charge Group Code', 'Charge Group Description', 'Arrest Type Code',
+        'Charge', 'Charge Description', 'Disposition Description', 'Cross Street',
+        'LAT', 'LON', 'Booking Date', 'Booking Time', 'Booking Location',
+        'Booking Location Code'
+    ],
+    'dtype': {
+        'Time': 'float32', 'Age': 'float32', 'Charge Group Code': 'float32',
+        'Booking Time': 'float32', 'Booking Location Code': 'float32',
+        'Sex Code': 'string[pyarrow]', 'Descent Code': 'string[pyarrow]',
+        'Charge Group Description': 'string[pyarrow]', 'Arrest Type Code': 'string[pyarrow]',
+        'Charge': 'string[pyarrow]', 'Charge Description': 'string[pyarrow]',
+        'Disposition Description': 'string[pyarrow]', 'Cross Street': 'string[pyarrow]',
+        'Booking Date': 'string[pyarrow]', 'Booking Location': 'string[pyarrow]'
+    },
+    'parse_dates': ['Arrest Date']
+}
+
 def rename_nypd_columns(df: pd.DataFrame) -> pd.DataFrame:
     """
     Rename NYPD dataset columns to standardized names.
@@ -77,12 +116,20 @@ def clean_nypd_data(df: pd.DataFrame) -> pd.DataFrame:
     df['Arrest_Borough'] = df['Arrest_Borough'].fillna('Unknown')
     df['Age_Group'] = df['Age_Group'].fillna('UNKNOWN')
 
+    # Low-cardinality text columns are stored as integer-coded categories
+    for col in ['Law_Category', 'Offense_Description', 'Offense_Category', 'Arrest_Borough', 'Age_Group']:
+        df[col] = df[col].astype('category')
+
     # Convert dates
     try:
-        df['Arrest_Date'] = pd.to_datetime(df['Arrest_Date'])
+        if not pd.api.types.is_datetime64_any_dtype(df['Arrest_Date']):
+            df['Arrest_Date'] = pd.to_datetime(df['Arrest_Date'])
         df['Arrest_Year'] = df['Arrest_Date'].dt.year
         df['Arrest_Month'] = df['Arrest_Date'].dt.month
         df['Arrest_Day'] = df['Arrest_Date'].dt.day
+        # Compact integer date parts; missing dates leave them as floats
+        if df['Arrest_Date'].notna().all():
+            df = df.astype({'Arrest_Year': 'int16', 'Arrest_Month': 'int8', 'Arrest_Day': 'int8'})
     except Exception as e:
         print(f"Error converting NYPD arrest date: {e}")
 
@@ -113,6 +160,10 @@ def clean_lapd_data(df: pd.DataFrame) -> pd.DataFrame:
     df['Booking_Location'] = df['Booking_Location'].fillna('Unknown')
     df['Booking_Location_Code'] = df['Booking_Location_Code'].fillna(-1)
 
+    # Low-cardinality text columns are stored as integer-coded categories
+    for col in ['Charge_Group_Description', 'Arrest_Type_Code', 'Disposition_Description', 'Booking_Location']:
+        df[col] = df[col].astype('category')
+
     # Clean Age
     if 'Age' in df.columns:
         invalid_age_mask = (df['Age'] < 0) | (df['Age'] > 100)
@@ -120,15 +171,19 @@ def clean_lapd_data(df: pd.DataFrame) -> pd.DataFrame:
 
     # Convert dates
     try:
-        df['Arrest_Date'] = pd.to_datetime(df['Arrest_Date'])
+        if not pd.api.types.is_datetime64_any_dtype(df['Arrest_Date']):
+            df['Arrest_Date'] = pd.to_datetime(df['Arrest_Date'])
         df['Arrest_Year'] = df['Arrest_Date'].dt.year
         df['Arrest_Month'] = df['Arrest_Date'].dt.month
         df['Arrest_Day'] = df['Arrest_Date'].dt.day
+        # Compact integer date parts; missing dates leave them as floats
+        if df['Arrest_Date'].notna().all():
+            df = df.astype({'Arrest_Year': 'int16', 'Arrest_Month': 'int8', 'Arrest_Day': 'int8'})
     except Exception as e:
         print(f"Error converting LAPD arrest date: {e}")
 
-    # Remove duplicates
-    df = df.drop_duplicates()
+    # Remove duplicates; the report ID identifies a record, so only it is hashed
+    df = df.drop_duplicates(subset=['ID'] if 'ID' in df.columns else None, keep='first')
 
     return df
 
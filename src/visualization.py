@@ -1,94 +1,75 @@
 import pandas as pd
 import numpy as np
+from concurrent.futures import ThreadPoolExecutor
+from functools import cache
 import matplotlib.pyplot as plt
 import seaborn as sns
 import contextily as ctx
-from scipy.stats import gaussian_kde
+from scipy.signal import fftconvolve
+from scipy.ndimage import map_coordinates
 from matplotlib.ticker import MaxNLocator
-from datetime import datetime
+from matplotlib.colors import LogNorm
+from matplotlib.figure import Figure
+from src.aggregation import temporal_counts, count_by_key, count_points_2d
+from src.data_processing import GENDER_DTYPE, RACE_DTYPE, AGE_DTYPE, OFFENSE_DTYPE
+
+# Axis labels in the order of the temporal_counts buckets
+DAYS_ORDER = ('Monday', 'Tuesday', 'Wednesday', 'Thursday', 'Friday', 'Saturday', 'Sunday')
+MONTH_NAMES = ('Jan', 'Feb', 'Mar', 'Apr', 'May', 'Jun',
+               'Jul', 'Aug', 'Sep', 'Oct', 'Nov', 'Dec')
+
+# Canonical categories of the columns compared by the demographic dashboard
+DEMOGRAPHIC_DTYPES = {
+    'Race_Std': RACE_DTYPE,
+    'Gender_Std': GENDER_DTYPE,
+    'Age_Category_Std': AGE_DTYPE,
+    'Offense_Std': OFFENSE_DTYPE,
+}
 
-def plot_crime_by_weekday(nypd_df: pd.DataFrame, lapd_df: pd.DataFrame, ax: plt.Axes, nypd_color: str, lapd_color: str) -> None:
+def plot_crime_by_weekday(nypd_df: pd.DataFrame | dict, lapd_df: pd.DataFrame | dict, ax: plt.Axes, nypd_color: str, lapd_color: str) -> None:
     """
     Plot crime frequency by day of week.
+    Accepts the full datasets, their summarize_temporal tables or temporal_counts results.
     """
-    def get_weekday(year, month, day):
-        try:
-            return datetime(year, month, day).weekday()
-        except (ValueError, TypeError):
-            return None
-
-    # Helper to process dataframe
-    def process_weekdays(df, dept_name):
-        weekdays = []
-        # Process in chunks if needed, but for now simple apply is fine for readability
-        # Optimization: Vectorized approach
-        dates = pd.to_datetime(df[['Arrest_Year', 'Arrest_Month', 'Arrest_Day']].rename(
-            columns={'Arrest_Year': 'year', 'Arrest_Month': 'month', 'Arrest_Day': 'day'}), errors='coerce')
-        weekdays = dates.dt.dayofweek.dropna().astype(int)
-        
-        days_map = {0: 'Monday', 1: 'Tuesday', 2: 'Wednesday', 3: 'Thursday',
-                    4: 'Friday', 5: 'Saturday', 6: 'Sunday'}
-        
-        day_names = weekdays.map(days_map)
-        counts = day_names.value_counts()
-        
-        data = []
-        days_order = ['Monday', 'Tuesday', 'Wednesday', 'Thursday', 'Friday', 'Saturday', 'Sunday']
-        for day in days_order:
-            data.append({'day_name': day, 'count': counts.get(day, 0), 'department': dept_name})
-            
-        return pd.DataFrame(data)
-
-    nypd_counts = process_weekdays(nypd_df, 'NYPD')
-    lapd_counts = process_weekdays(lapd_df, 'LAPD')
-    day_counts = pd.concat([nypd_counts, lapd_counts])
+    nypd_counts = temporal_counts(nypd_df)['weekday']
+    lapd_counts = temporal_counts(lapd_df)['weekday']
 
-    # Add day index for sorting
-    days_order = ['Monday', 'Tuesday', 'Wednesday', 'Thursday', 'Friday', 'Saturday', 'Sunday']
-    day_counts['day_index'] = day_counts['day_name'].map({day: i for i, day in enumerate(days_order)})
-    day_counts = day_counts.sort_values('day_index')
+    # Grouped bars: each department takes half of the 0.8-wide slot per day
+    x = np.arange(len(DAYS_ORDER))
+    width = 0.4
+    nypd_bars = ax.bar(x - width / 2, nypd_counts, width, color=nypd_color, label='NYPD')
+    lapd_bars = ax.bar(x + width / 2, lapd_counts, width, color=lapd_color, label='LAPD')
+    ax.set_xticks(x)
+    ax.set_xticklabels(DAYS_ORDER)
 
-    sns.barplot(x='day_name', y='count', hue='department', data=day_counts,
-                palette=[nypd_color, lapd_color], ax=ax)
     ax.set_title('Crime Frequency by Day of Week', pad=15)
     ax.set_xlabel('Day of Week')
     ax.set_ylabel('Number of Crimes')
     ax.tick_params(axis='x', rotation=0)
     ax.legend(title='Department')
 
-    for p in ax.patches:
-        height = p.get_height()
-        if height > 0:
-            ax.text(p.get_x() + p.get_width()/2., height + height*0.02,
-                    f'{int(height):,}', ha="center", fontsize=9)
+    for bars in (nypd_bars, lapd_bars):
+        ax.bar_label(bars, fmt=lambda height: f'{int(height):,}' if height > 0 else '',
+                     fontsize=9, padding=2)
 
-def plot_crime_by_month(nypd_df: pd.DataFrame, lapd_df: pd.DataFrame, ax: plt.Axes, nypd_color: str, lapd_color: str) -> None:
+def plot_crime_by_month(nypd_df: pd.DataFrame | dict, lapd_df: pd.DataFrame | dict, ax: plt.Axes, nypd_color: str, lapd_color: str) -> None:
     """
     Create a line plot showing crime frequency by month.
+    Accepts the full datasets, their summarize_temporal tables or temporal_counts results.
     """
     try:
         def get_month_counts(df, dept_name):
-            counts = df['Arrest_Month'].value_counts().reset_index()
-            counts.columns = ['month', 'count']
-            counts['department'] = dept_name
-            counts = counts[counts['month'].between(1, 12)]
-            
-            # Ensure all months present
-            all_months = pd.DataFrame({'month': range(1, 13)})
-            all_months['department'] = dept_name
-            return pd.merge(all_months, counts, on=['month', 'department'], how='left').fillna(0)
+            counts = temporal_counts(df)['month']
+            return pd.DataFrame({'month': range(1, 13), 'department': dept_name, 'count': counts})
 
         nypd_counts = get_month_counts(nypd_df, 'NYPD')
         lapd_counts = get_month_counts(lapd_df, 'LAPD')
 
-        month_names = ['Jan', 'Feb', 'Mar', 'Apr', 'May', 'Jun',
-                      'Jul', 'Aug', 'Sep', 'Oct', 'Nov', 'Dec']
-        
         ax.set_title('Crime Frequency by Month', pad=15)
         ax.set_xlabel('Month')
         ax.set_ylabel('Number of Crimes')
-        ax.set_xticks(range(len(month_names)))
-        ax.set_xticklabels(month_names)
+        ax.set_xticks(range(len(MONTH_NAMES)))
+        ax.set_xticklabels(MONTH_NAMES)
         ax.set_xlim(-0.5, 11.5)
 
         # Seasonal background
@@ -99,7 +80,7 @@ def plot_crime_by_month(nypd_df: pd.DataFrame, lapd_df: pd.DataFrame, ax: plt.Ax
         ax.axvspan(7.5, 10.5, alpha=0.1, color='orange', label='Fall')
 
         for dept, color, data in [('NYPD', nypd_color, nypd_counts), ('LAPD', lapd_color, lapd_counts)]:
-            data = data.sort_values('month')
+            # Rows are already months 1-12 in order
             data['month_idx'] = data['month'] - 1
             ax.plot(data['month_idx'], data['count'], color=color, marker='o',
                     label=dept, linewidth=2, markersize=8)
@@ -121,84 +102,93 @@ def plot_crime_by_month(nypd_df: pd.DataFrame, lapd_df: pd.DataFrame, ax: plt.Ax
                ha='center', va='center', fontsize=10, transform=ax.transAxes,
                bbox=dict(facecolor='white', edgecolor='red', alpha=0.8))
 
-def plot_crime_by_year(nypd_df: pd.DataFrame, lapd_df: pd.DataFrame, ax: plt.Axes, nypd_color: str, lapd_color: str) -> None:
+def linear_trend(x: np.ndarray, y: np.ndarray) -> np.ndarray:
+    """
+    Least-squares line through (x, y), evaluated at x.
+    Same fit as np.polyfit(x, y, 1), from the closed-form moment sums;
+    points with a missing y are left out of the fit.
+    """
+    known = np.isfinite(y)
+    x_mean = x[known].mean()
+    y_mean = y[known].mean()
+    x_centered = x[known] - x_mean
+    slope = (x_centered * (y[known] - y_mean)).sum() / (x_centered ** 2).sum()
+    return y_mean + slope * (x - x_mean)
+
+def plot_crime_by_year(nypd_df: pd.DataFrame | dict, lapd_df: pd.DataFrame | dict, ax: plt.Axes, nypd_color: str, lapd_color: str) -> None:
     """
     Create a bar plot showing crime frequency by year.
+    Accepts the full datasets, their summarize_temporal tables or temporal_counts results.
     """
-    def get_year_counts(df, dept_name):
-        counts = df['Arrest_Year'].value_counts().reset_index()
-        counts.columns = ['year', 'count']
-        counts['department'] = dept_name
-        return counts
-
-    nypd_counts = get_year_counts(nypd_df, 'NYPD')
-    lapd_counts = get_year_counts(lapd_df, 'LAPD')
-    year_counts = pd.concat([nypd_counts, lapd_counts])
-
-    year_pivot = year_counts.pivot(index='year', columns='department', values='count').fillna(0)
-
-    year_pivot[['NYPD', 'LAPD']].plot(kind='bar', stacked=False, ax=ax,
-                                      color=[nypd_color, lapd_color], width=0.7,
-                                      edgecolor='black', linewidth=0.5)
+    nypd_counts = temporal_counts(nypd_df)
+    lapd_counts = temporal_counts(lapd_df)
+
+    # Place both departments' counts on one shared span of years
+    spans = [(counts['first_year'], counts['year']) for counts in (nypd_counts, lapd_counts)
+             if len(counts['year'])]
+    first_year = min((start for start, _ in spans), default=0)
+    last_year = max((start + len(counts) for start, counts in spans), default=0)
+
+    year_table = np.zeros((last_year - first_year, 2), dtype=np.int64)
+    for i, counts in enumerate([nypd_counts, lapd_counts]):
+        offset = counts['first_year'] - first_year
+        year_table[offset:offset + len(counts['year']), i] = counts['year']
+
+    year_pivot = pd.DataFrame(year_table, columns=['NYPD', 'LAPD'],
+                              index=pd.RangeIndex(first_year, last_year, name='year'))
+    year_pivot.columns.name = 'department'
+    # Only years with arrests in either department
+    year_pivot = year_pivot[year_pivot.sum(axis=1) > 0]
+
+    # Grouped bars: each department takes half of the 0.7-wide slot per year
+    x = np.arange(len(year_pivot.index))
+    width = 0.35
+    year_bars = [
+        ax.bar(x + offset, year_pivot[dept], width, color=color, label=dept,
+               edgecolor='black', linewidth=0.5)
+        for dept, color, offset in [('NYPD', nypd_color, -width / 2), ('LAPD', lapd_color, width / 2)]
+    ]
 
     # Trend lines
-    for i, dept in enumerate(['NYPD', 'LAPD']):
-        if len(year_pivot) >= 3:
-            x = np.arange(len(year_pivot.index))
-            y = year_pivot[dept].values
-            z = np.polyfit(x, y, 1)
-            p = np.poly1d(z)
-            ax.plot(x, p(x), '--', color=['darkblue', 'darkred'][i],
-                    linewidth=1.5, alpha=0.8)
+    if len(year_pivot) >= 3:
+        for i, dept in enumerate(['NYPD', 'LAPD']):
+            ax.plot(x, linear_trend(x, year_pivot[dept].to_numpy()), '--',
+                    color=['darkblue', 'darkred'][i], linewidth=1.5, alpha=0.8)
 
     ax.set_title('Crime Frequency by Year', pad=15)
     ax.set_xlabel('Year')
     ax.set_ylabel('Number of Crimes')
     ax.legend(title='Department')
 
-    for i, (year, row) in enumerate(year_pivot.iterrows()):
-        for j, dept in enumerate(['NYPD', 'LAPD']):
-            height = row[dept]
-            ax.text(i + (j-0.5)*0.3, height * 1.02,
-                   f'{int(height):,}', ha='center', va='bottom',
-                   fontsize=9, color=['darkblue', 'darkred'][j])
+    for bars, color in zip(year_bars, ['darkblue', 'darkred']):
+        ax.bar_label(bars, fmt=lambda height: f'{int(height):,}', fontsize=9, color=color, padding=2)
 
+    ax.set_xticks(x)
     ax.set_xticklabels([str(year) for year in year_pivot.index], rotation=0)
 
-def plot_crime_by_day_of_month(nypd_df: pd.DataFrame, lapd_df: pd.DataFrame, ax: plt.Axes, nypd_color: str, lapd_color: str) -> None:
+def plot_crime_by_day_of_month(nypd_df: pd.DataFrame | dict, lapd_df: pd.DataFrame | dict, ax: plt.Axes, nypd_color: str, lapd_color: str) -> None:
     """
     Create a plot showing crime frequency by day of month.
+    Accepts the full datasets, their summarize_temporal tables or temporal_counts results.
     """
-    if 'Arrest_Day' not in nypd_df.columns or 'Arrest_Day' not in lapd_df.columns:
+    if any(isinstance(df, pd.DataFrame) and 'Arrest_Day' not in df.columns for df in (nypd_df, lapd_df)):
         ax.text(0.5, 0.5, "Error: Arrest_Day column not found",
                 ha='center', va='center', fontsize=12, transform=ax.transAxes)
         return
 
     try:
-        all_days = pd.Series(range(1, 32))
-
-        def get_day_counts(df, dept_name):
-            counts = df['Arrest_Day'].value_counts().reset_index()
-            counts.columns = ['day', 'count']
-            day_counts = pd.DataFrame({'day': all_days})
-            day_counts = day_counts.merge(counts, on='day', how='left').fillna(0)
-            day_counts['department'] = dept_name
-            day_counts = day_counts.sort_values('day')
-            day_counts['rolling_avg'] = day_counts['count'].rolling(window=3, center=True).mean()
-            return day_counts
-
-        nypd_day_counts = get_day_counts(nypd_df, 'NYPD')
-        lapd_day_counts = get_day_counts(lapd_df, 'LAPD')
-
-        ax.scatter(nypd_day_counts['day'], nypd_day_counts['count'],
-                  color=nypd_color, alpha=0.3, s=30, label='NYPD (Daily)')
-        ax.plot(nypd_day_counts['day'], nypd_day_counts['rolling_avg'],
-               color=nypd_color, linewidth=2.5, label='NYPD (3-day avg)')
-
-        ax.scatter(lapd_day_counts['day'], lapd_day_counts['count'],
-                  color=lapd_color, alpha=0.3, s=30, label='LAPD (Daily)')
-        ax.plot(lapd_day_counts['day'], lapd_day_counts['rolling_avg'],
-               color=lapd_color, linewidth=2.5, label='LAPD (3-day avg)')
+        days = np.arange(1, 32)
+
+        def rolling_average(counts):
+            # Centered 3-day mean; the first and last day lack a full window
+            rolling = np.convolve(counts, np.ones(3) / 3, mode='same')
+            rolling[[0, -1]] = np.nan
+            return rolling
+
+        for dept, color, df in [('NYPD', nypd_color, nypd_df), ('LAPD', lapd_color, lapd_df)]:
+            counts = temporal_counts(df)['day']
+            ax.scatter(days, counts, color=color, alpha=0.3, s=30, label=f'{dept} (Daily)')
+            ax.plot(days, rolling_average(counts), color=color, linewidth=2.5, label=f'{dept} (3-day avg)')
 
         for day in [1, 15, 28]:
             ax.axvline(x=day, color='gray', linestyle='--', alpha=0.5)
@@ -224,27 +214,60 @@ def plot_crime_by_day_of_month(nypd_df: pd.DataFrame, lapd_df: pd.DataFrame, ax:
                 ha='center', va='center', fontsize=10, transform=ax.transAxes,
                 bbox=dict(facecolor='white', edgecolor='red', alpha=0.8))
 
-def create_temporal_analysis_plot(nypd_df: pd.DataFrame, lapd_df: pd.DataFrame) -> plt.Figure:
+def get_figure_axes(fig: plt.Figure | None, nrows: int, ncols: int, **fig_kw) -> tuple[plt.Figure, np.ndarray]:
+    """
+    Return a figure and its flattened nrows x ncols axes, reusing `fig` when given.
+    A reused figure keeps its canvas: matching axes are only cleared, and any
+    other layout (e.g. with colorbars) is rebuilt on the same figure. `fig_kw`
+    is passed to Figure for a new figure only. New figures are not registered
+    with pyplot, so they are freed with their last reference instead of piling
+    up in pyplot's figure manager; show them with e.g. IPython's display(fig).
+    """
+    if fig is None:
+        fig = Figure(**fig_kw)
+        return fig, fig.subplots(nrows, ncols, squeeze=False).flatten()
+
+    if len(fig.axes) == nrows * ncols:
+        for ax in fig.axes:
+            ax.clear()
+            ax.relim()  # clear() can leave stale data limits behind
+        return fig, np.array(fig.axes)
+
+    fig.clear()
+    return fig, fig.subplots(nrows, ncols, squeeze=False).flatten()
+
+_temporal_style_applied = False
+
+def create_temporal_analysis_plot(nypd_df: pd.DataFrame, lapd_df: pd.DataFrame,
+                                  fig: plt.Figure | None = None) -> plt.Figure:
     """
     Create and return the figure for temporal analysis visualizations.
+    Pass the figure of a previous call as `fig` to redraw it in place; callers
+    refreshing a dashboard should keep that figure alive between refreshes.
     """
-    sns.set_style("whitegrid")
-    plt.rcParams['font.family'] = 'sans-serif'
+    global _temporal_style_applied
+    if not _temporal_style_applied:
+        sns.set_style("whitegrid")
+        plt.rcParams['font.family'] = 'sans-serif'
+        _temporal_style_applied = True
     
     nypd_color = '#1f77b4'
     lapd_color = '#ff7f0e'
 
-    fig, axes = plt.subplots(2, 2, figsize=(20, 16))
-    axes = axes.flatten()
+    fig, axes = get_figure_axes(fig, 2, 2, figsize=(20, 16))
 
     fig.suptitle('Temporal Analysis of Crime Patterns: NYPD vs. LAPD', fontsize=18, y=0.98)
 
-    plot_crime_by_weekday(nypd_df, lapd_df, axes[0], nypd_color, lapd_color)
-    plot_crime_by_month(nypd_df, lapd_df, axes[1], nypd_color, lapd_color)
-    plot_crime_by_year(nypd_df, lapd_df, axes[2], nypd_color, lapd_color)
-    plot_crime_by_day_of_month(nypd_df, lapd_df, axes[3], nypd_color, lapd_color)
+    # Count each department once and share the results across the four plots
+    nypd_counts = temporal_counts(nypd_df)
+    lapd_counts = temporal_counts(lapd_df)
+
+    plot_crime_by_weekday(nypd_counts, lapd_counts, axes[0], nypd_color, lapd_color)
+    plot_crime_by_month(nypd_counts, lapd_counts, axes[1], nypd_color, lapd_color)
+    plot_crime_by_year(nypd_counts, lapd_counts, axes[2], nypd_color, lapd_color)
+    plot_crime_by_day_of_month(nypd_counts, lapd_counts, axes[3], nypd_color, lapd_color)
 
-    plt.tight_layout(rect=[0, 0.03, 1, 0.95])
+    fig.tight_layout(rect=[0, 0.03, 1, 0.95])
     return fig
 
 # City configurations for map visualizations
@@ -275,9 +298,10 @@ CITY_CONFIGS = {
     }
 }
 
-def prepare_crime_data(df: pd.DataFrame, city_name: str, sample_frac: float = 0.05) -> pd.DataFrame:
+def prepare_crime_data(df: pd.DataFrame, city_name: str, sample_frac: float | None = 0.05) -> pd.DataFrame:
     """
     Filter and prepare crime data for visualization.
+    Pass sample_frac=None to keep every point inside the city boundaries.
     """
     if city_name not in CITY_CONFIGS:
         raise ValueError(f"city_name must be one of {list(CITY_CONFIGS.keys())}")
@@ -286,28 +310,18 @@ def prepare_crime_data(df: pd.DataFrame, city_name: str, sample_frac: float = 0.
     lat_min, lat_max = boundaries['lat']
     lon_min, lon_max = boundaries['lon']
 
-    # Filter data
-    filter_query = (
-        f"Latitude >= {lat_min} & "
-        f"Latitude <= {lat_max} & "
-        f"Longitude >= {lon_min} & "
-        f"Longitude <= {lon_max}"
-    )
-    filtered_df = df.query(filter_query)
+    # Filter data; missing coordinates become NaN and fail every comparison
+    lat = df['Latitude'].to_numpy(dtype='float64', na_value=np.nan)
+    lon = df['Longitude'].to_numpy(dtype='float64', na_value=np.nan)
+    mask = (lat >= lat_min) & (lat <= lat_max) & (lon >= lon_min) & (lon <= lon_max)
+    filtered_df = df.iloc[np.flatnonzero(mask)]
 
     # Sample data if necessary
-    if len(filtered_df) > 10000:
+    if sample_frac is not None and len(filtered_df) > 10000:
         if 'Offense_Std' in filtered_df.columns:
-            # Stratified sampling
-            offense_groups = filtered_df.groupby('Offense_Std')
-            sampled_dfs = []
-
-            for name, group in offense_groups:
-                group_size = len(group)
-                sample_size = min(int(group_size * sample_frac) + 1, group_size)
-                sampled_dfs.append(group.sample(sample_size))
-
-            sampled_df = pd.concat(sampled_dfs)
+            # Stratified sampling, the same fraction from every offense category
+            sampled_df = filtered_df.groupby('Offense_Std', sort=False, observed=True).sample(
+                frac=sample_frac, random_state=42)
         else:
             # Random sampling
             sampled_df = filtered_df.sample(frac=sample_frac, random_state=42)
@@ -316,16 +330,56 @@ def prepare_crime_data(df: pd.DataFrame, city_name: str, sample_frac: float = 0.
 
     return sampled_df
 
-def calculate_density(x: np.ndarray, y: np.ndarray):
+def rasterize_points(x: np.ndarray, y: np.ndarray, extent: tuple[float, float, float, float],
+                     plot_width: int = 800, plot_height: int = 800) -> np.ndarray:
+    """
+    Aggregate points into a fixed grid of counts with one cell per output pixel.
+    The extent is (lon_min, lon_max, lat_min, lat_max); row 0 is the southern edge.
+    """
+    lon_min, lon_max, lat_min, lat_max = extent
+    return count_points_2d(y, x, (lat_min, lat_max), (lon_min, lon_max), bins=(plot_height, plot_width))
+
+def calculate_density(x: np.ndarray, y: np.ndarray, grid_size: int = 256):
     """
     Calculate kernel density estimate for points.
+    The points are binned onto a grid_size x grid_size grid and smoothed with an
+    FFT convolution by a Gaussian kernel (Scott's rule bandwidth per axis), then
+    the grid is interpolated back at each point.
     """
     if len(x) <= 10:
         return None, None
 
     try:
-        k = gaussian_kde(np.vstack([x, y]), bw_method='scott')
-        densities = k(np.vstack([x, y]))
+        # Coordinates only need float32 precision, which halves the memory traffic
+        x = np.asarray(x, dtype=np.float32)
+        y = np.asarray(y, dtype=np.float32)
+
+        bandwidth = len(x) ** (-1 / 6)
+        # Compare the extremes, since the float32 std of equal values is not exactly 0
+        if not (x.max() > x.min() and y.max() > y.min()):
+            raise ValueError("points do not spread in both directions")
+        sigma_x = float(np.std(x)) * bandwidth
+        sigma_y = float(np.std(y)) * bandwidth
+
+        # Pad the grid so the kernel tails around the outermost points fit
+        x_range = (float(x.min()) - 3 * sigma_x, float(x.max()) + 3 * sigma_x)
+        y_range = (float(y.min()) - 3 * sigma_y, float(y.max()) + 3 * sigma_y)
+        counts = count_points_2d(x, y, x_range, y_range, bins=(grid_size, grid_size))
+        dx = (x_range[1] - x_range[0]) / grid_size
+        dy = (y_range[1] - y_range[0]) / grid_size
+
+        def gaussian_kernel_1d(sigma, step):
+            radius = min(int(np.ceil(3 * sigma / step)), grid_size)
+            offsets = np.arange(-radius, radius + 1) * step
+            weights = np.exp(-0.5 * (offsets / sigma) ** 2)
+            return weights / weights.sum()
+
+        kernel = np.outer(gaussian_kernel_1d(sigma_x, dx), gaussian_kernel_1d(sigma_y, dy))
+        grid = fftconvolve(counts, kernel, mode='same') / (len(x) * dx * dy)
+
+        # Bilinear interpolation at each point, in units of bin centers
+        coords = np.vstack([(x - x_range[0]) / dx - 0.5, (y - y_range[0]) / dy - 0.5])
+        densities = map_coordinates(grid, coords, order=1, mode='nearest')
 
         if densities.max() > densities.min():
             densities_norm = (densities - densities.min()) / (densities.max() - densities.min())
@@ -337,13 +391,35 @@ def calculate_density(x: np.ndarray, y: np.ndarray):
         print(f"KDE calculation failed: {e}")
         return None, None
 
+@cache
+def get_basemap(city_name: str, zoom: int) -> tuple[np.ndarray, tuple[float, float, float, float]]:
+    """
+    Fetch the basemap mosaic covering a city's boundaries, warped to EPSG:4326.
+    Returns the image and its (west, east, south, north) extent. The result is
+    cached per city and zoom, so redrawing a map does not download tiles again;
+    failed fetches raise and are retried on the next call.
+    """
+    boundaries = CITY_CONFIGS[city_name]['boundaries']
+    lat_min, lat_max = boundaries['lat']
+    lon_min, lon_max = boundaries['lon']
+
+    img, extent = ctx.bounds2img(lon_min, lat_min, lon_max, lat_max, zoom=zoom,
+                                 source=ctx.providers.CartoDB.Positron, ll=True)
+    return ctx.warp_tiles(img, extent, t_crs='EPSG:4326')
+
 def plot_crime_density(df: pd.DataFrame, ax: plt.Axes, city_name: str, alpha: float = 0.6, 
-                      cmap: str = 'hot_r', point_size: int = 10, zoom_level: int = None) -> None:
+                      cmap: str = 'hot_r', point_size: int = 10, zoom_level: int = None,
+                      method: str = 'scatter') -> None:
     """
     Plot crime density for a given city.
+    method='scatter' colors each point by its kernel density estimate, while
+    method='raster' renders per-pixel counts and method='hexbin' counts per
+    hexagonal cell, so their cost does not grow with the number of points drawn.
     """
     if city_name not in CITY_CONFIGS:
         raise ValueError(f"city_name must be one of {list(CITY_CONFIGS.keys())}")
+    if method not in ('scatter', 'raster', 'hexbin'):
+        raise ValueError("method must be one of ['scatter', 'raster', 'hexbin']")
 
     config = CITY_CONFIGS[city_name]
     lat_min, lat_max = config['boundaries']['lat']
@@ -351,34 +427,83 @@ def plot_crime_density(df: pd.DataFrame, ax: plt.Axes, city_name: str, alpha: fl
     zoom = zoom_level if zoom_level is not None else config['zoom']
     title = config['title']
 
-    x = df['Longitude'].values
-    y = df['Latitude'].values
-
-    densities, densities_norm = calculate_density(x, y)
-
-    if densities is not None:
-        scatter = ax.scatter(
-            x, y,
-            s=point_size,
-            c=densities,
+    x = df['Longitude'].to_numpy(dtype=np.float32, na_value=np.nan)
+    y = df['Latitude'].to_numpy(dtype=np.float32, na_value=np.nan)
+
+    if method == 'raster':
+        extent = (lon_min, lon_max, lat_min, lat_max)
+        counts = rasterize_points(x, y, extent)
+        # Empty pixels stay transparent so the basemap shows through
+        image = ax.imshow(
+            np.ma.masked_equal(counts, 0),
+            extent=extent,
+            origin='lower',
+            aspect='auto',
+            interpolation='nearest',
             cmap=cmap,
-            alpha=alpha
+            norm=LogNorm(vmin=1, vmax=max(counts.max(), 1)),
+            alpha=alpha,
+            zorder=1
         )
-        cbar = plt.colorbar(scatter, ax=ax, orientation='vertical', pad=0.01, shrink=0.5)
-        cbar.set_label('Crime Density', fontsize=10)
-    else:
-        ax.scatter(
+        cbar = ax.figure.colorbar(image, ax=ax, orientation='vertical', pad=0.01, shrink=0.5)
+        cbar.set_label('Crimes per Pixel', fontsize=10)
+    elif method == 'hexbin':
+        # One collection of hexagons on a log color scale; empty cells are not drawn
+        hexbin = ax.hexbin(
             x, y,
-            s=point_size,
-            c=plt.cm.get_cmap(cmap)(np.linspace(0, 1, len(x))),
-            alpha=alpha
+            gridsize=(100, 80),
+            extent=(lon_min, lon_max, lat_min, lat_max),
+            mincnt=1,
+            cmap=cmap,
+            norm=LogNorm(vmin=1),
+            alpha=alpha,
+            zorder=1
         )
+        # get_array() is typed Optional; hexbin always sets it, but no cells still scale to 1
+        cell_counts = hexbin.get_array()
+        max_count = cell_counts.max() if cell_counts is not None and len(cell_counts) else 1
+        hexbin.set_clim(1, max(max_count, 1))
+        cbar = ax.figure.colorbar(hexbin, ax=ax, orientation='vertical', pad=0.01, shrink=0.5)
+        cbar.set_label('Crimes per Cell', fontsize=10)
+    else:
+        densities, densities_norm = calculate_density(x, y)
+
+        # Points are drawn as one raster image without edge paths, so output
+        # size and render time stay flat in the number of points
+        if densities is not None:
+            scatter = ax.scatter(
+                x, y,
+                s=point_size,
+                c=densities,
+                cmap=cmap,
+                alpha=alpha,
+                linewidths=0,
+                edgecolors='none',
+                rasterized=True
+            )
+            cbar = ax.figure.colorbar(scatter, ax=ax, orientation='vertical', pad=0.01, shrink=0.5)
+            cbar.set_label('Crime Density', fontsize=10)
+        else:
+            ax.scatter(
+                x, y,
+                s=point_size,
+                c=plt.get_cmap(cmap)(np.linspace(0, 1, len(x))),
+                alpha=alpha,
+                linewidths=0,
+                edgecolors='none',
+                rasterized=True
+            )
 
     ax.set_xlim(lon_min, lon_max)
     ax.set_ylim(lat_min, lat_max)
 
     try:
-        ctx.add_basemap(ax, crs="EPSG:4326", source=ctx.providers.CartoDB.Positron, zoom=zoom)
+        img, extent = get_basemap(city_name, zoom)
+        ax.imshow(img, extent=extent, interpolation='bilinear')
+        # The tile mosaic extends past the city, so restore the view afterwards
+        ax.set_xlim(lon_min, lon_max)
+        ax.set_ylim(lat_min, lat_max)
+        ctx.add_attribution(ax, ctx.providers.CartoDB.Positron['attribution'])
     except Exception as e:
         print(f"Could not add basemap: {e}")
         ax.set_facecolor('#F2F2F2')
@@ -413,36 +538,69 @@ def plot_crime_density(df: pd.DataFrame, ax: plt.Axes, city_name: str, alpha: fl
     )
 
 def create_crime_density_comparison(nypd_df: pd.DataFrame, lapd_df: pd.DataFrame, 
-                                  sample_frac: float = 0.01, fig_size: tuple = (20, 10),
-                                  cmap: str = 'hot_r', point_size: int = 8) -> plt.Figure:
+                                  sample_frac: float | None = 0.01, fig_size: tuple = (20, 10),
+                                  cmap: str = 'hot_r', point_size: int = 8,
+                                  method: str = 'raster', fig: plt.Figure | None = None) -> plt.Figure:
     """
     Create a side-by-side comparison of crime density maps.
+    The default raster method and method='hexbin' plot every point;
+    sample_frac only applies to method='scatter'. Pass the figure of a
+    previous call as `fig` to redraw it in place.
     """
     required_cols = ['Latitude', 'Longitude']
     for df, city in [(nypd_df, 'NYC'), (lapd_df, 'LA')]:
         missing_cols = [col for col in required_cols if col not in df.columns]
         if missing_cols:
             # Return empty figure or handle error gracefully for dashboard
-            fig, ax = plt.subplots(figsize=(10, 6))
+            fig, (ax,) = get_figure_axes(fig, 1, 1, figsize=(10, 6))
             ax.text(0.5, 0.5, f"Missing coordinates for {city}: {missing_cols}", 
                    ha='center', va='center')
             return fig
 
-    nyc_data = prepare_crime_data(nypd_df, 'NYC', sample_frac=sample_frac)
-    la_data = prepare_crime_data(lapd_df, 'LA', sample_frac=sample_frac)
+    if method in ('raster', 'hexbin'):
+        sample_frac = None
+
+    # The two cities are independent and the filtering releases the GIL, so
+    # prepare them concurrently; plotting and basemap fetches stay sequential
+    with ThreadPoolExecutor(max_workers=2) as executor:
+        nyc_future = executor.submit(prepare_crime_data, nypd_df, 'NYC', sample_frac=sample_frac)
+        la_future = executor.submit(prepare_crime_data, lapd_df, 'LA', sample_frac=sample_frac)
+        nyc_data, la_data = nyc_future.result(), la_future.result()
 
-    fig, axes = plt.subplots(1, 2, figsize=fig_size, constrained_layout=True)
+    fig, axes = get_figure_axes(fig, 1, 2, figsize=fig_size, constrained_layout=True)
 
-    plot_crime_density(nyc_data, axes[0], 'NYC', cmap=cmap, point_size=point_size)
-    plot_crime_density(la_data, axes[1], 'LA', cmap=cmap, point_size=point_size)
+    plot_crime_density(nyc_data, axes[0], 'NYC', cmap=cmap, point_size=point_size, method=method)
+    plot_crime_density(la_data, axes[1], 'LA', cmap=cmap, point_size=point_size, method=method)
 
     fig.suptitle("Crime Density Comparison: NYC vs. LA", fontsize=16)
     return fig
 
+def demographic_percentages(df: pd.DataFrame) -> dict[str, pd.Series]:
+    """
+    Share of rows (in %) per canonical category of each demographic column,
+    from one bincount over each column's category codes. Missing values and
+    labels outside the canonical categories count toward the total only.
+    """
+    percentages = {}
+    for column, dtype in DEMOGRAPHIC_DTYPES.items():
+        values = df[column]
+        if not isinstance(values.dtype, pd.CategoricalDtype):
+            # Plain string columns are factorized once
+            values = values.astype('category')
+        # Standardized columns already carry the canonical codes; anything else is
+        # recoded on the category table, with unknown labels becoming missing
+        if list(values.cat.categories) != list(dtype.categories):
+            values = values.cat.set_categories(dtype.categories)
+        counts = count_by_key(values.cat.codes.to_numpy(), len(dtype.categories))
+        percentages[column] = pd.Series(counts / len(df) * 100, index=dtype.categories)
+    return percentages
+
 def create_demographic_dashboard(df1: pd.DataFrame, df2: pd.DataFrame, 
-                               df1_name: str = "NYPD", df2_name: str = "LAPD") -> plt.Figure:
+                               df1_name: str = "NYPD", df2_name: str = "LAPD",
+                               fig: plt.Figure | None = None) -> plt.Figure:
     """
     Creates a comprehensive demographic comparison dashboard.
+    Pass the figure of a previous call as `fig` to redraw it in place.
     """
     # Use a dark style for this specific plot if desired, or stick to whitegrid
     # The original code used dark_background, but let's stick to the current style or use a context manager
@@ -452,11 +610,9 @@ def create_demographic_dashboard(df1: pd.DataFrame, df2: pd.DataFrame,
         NYPD_color = '#5e9cd3'
         LAPD_color = '#f49c3b'
         
-        fig, axes = plt.subplots(2, 2, figsize=(16, 12), facecolor='#1e1e1e')
+        fig, axes = get_figure_axes(fig, 2, 2, figsize=(16, 12), facecolor='#1e1e1e')
         fig.patch.set_facecolor('#1e1e1e')
 
-        axes = axes.flatten()
-
         for ax in axes:
             ax.set_facecolor('#1e1e1e')
             ax.grid(True, color='#333333', linestyle='-', linewidth=0.5, alpha=0.7)
@@ -466,16 +622,13 @@ def create_demographic_dashboard(df1: pd.DataFrame, df2: pd.DataFrame,
             ax.spines['left'].set_color('#333333')
             ax.tick_params(colors='#cccccc')
 
+        pct1 = demographic_percentages(df1)
+        pct2 = demographic_percentages(df2)
+
         # 1. Race Distribution
         ax_race = axes[0]
-        race_categories = ['Black', 'Hispanic', 'White', 'Asian/Pacific Islander',
-                          'Other', 'Native American', 'Unknown']
-        
-        race_pct1 = (df1['Race_Std'].value_counts() / len(df1)) * 100
-        race_pct2 = (df2['Race_Std'].value_counts() / len(df2)) * 100
-        
-        race_pct1 = race_pct1.reindex(race_categories, fill_value=0)
-        race_pct2 = race_pct2.reindex(race_categories, fill_value=0)
+        race_pct1 = pct1['Race_Std']
+        race_pct2 = pct2['Race_Std']
         
         sorted_cats = ['Black', 'Hispanic', 'White', 'Asian/Pacific Islander',
                       'Other', 'Unknown', 'Native American']
@@ -498,13 +651,13 @@ def create_demographic_dashboard(df1: pd.DataFrame, df2: pd.DataFrame,
 
         # 2. Gender Distribution
         ax_gender = axes[1]
-        gender_pct1 = (df1['Gender_Std'].value_counts() / len(df1)) * 100
-        gender_pct2 = (df2['Gender_Std'].value_counts() / len(df2)) * 100
+        gender_pct1 = pct1['Gender_Std']
+        gender_pct2 = pct2['Gender_Std']
         
-        male1 = gender_pct1.get('Male', 0)
-        female1 = gender_pct1.get('Female', 0)
-        male2 = gender_pct2.get('Male', 0)
-        female2 = gender_pct2.get('Female', 0)
+        male1 = gender_pct1['Male']
+        female1 = gender_pct1['Female']
+        male2 = gender_pct2['Male']
+        female2 = gender_pct2['Female']
         
         ax_gender.pie([male2, female2], radius=0.7, wedgeprops=dict(width=0.3, edgecolor='#1e1e1e'),
                      startangle=90, colors=[LAPD_color, '#ffc681'])
@@ -523,13 +676,10 @@ def create_demographic_dashboard(df1: pd.DataFrame, df2: pd.DataFrame,
         ax_age = axes[2]
         age_categories = ['<18', '18-24', '25-44', '45-64', '65+']
         
-        age_pct1 = (df1['Age_Category_Std'].value_counts() / len(df1)) * 100
-        age_pct2 = (df2['Age_Category_Std'].value_counts() / len(df2)) * 100
-        
-        age_pct1 = age_pct1.reindex(age_categories, fill_value=0)
-        age_pct2 = age_pct2.reindex(age_categories, fill_value=0)
+        age_pct1 = pct1['Age_Category_Std']
+        age_pct2 = pct2['Age_Category_Std']
         
-        age_df = pd.DataFrame({df1_name: age_pct1, df2_name: age_pct2})
+        age_df = pd.DataFrame({df1_name: age_pct1[age_categories], df2_name: age_pct2[age_categories]})
         age_df.plot(kind='line', marker='o', markersize=8, linewidth=2, ax=ax_age, color=[NYPD_color, LAPD_color])
         
         ax_age.set_title("Age Distribution", fontsize=14, color='white')
@@ -543,14 +693,8 @@ def create_demographic_dashboard(df1: pd.DataFrame, df2: pd.DataFrame,
 
         # 4. Offense Type Distribution
         ax_offense = axes[3]
-        offense_categories = ['Violent Crime', 'Property Crime', 'Drug Offense',
-                            'Weapon Offense', 'Traffic Violation', 'Other']
-                            
-        offense_pct1 = (df1['Offense_Std'].value_counts() / len(df1)) * 100
-        offense_pct2 = (df2['Offense_Std'].value_counts() / len(df2)) * 100
-        
-        offense_pct1 = offense_pct1.reindex(offense_categories, fill_value=0)
-        offense_pct2 = offense_pct2.reindex(offense_categories, fill_value=0)
+        offense_pct1 = pct1['Offense_Std']
+        offense_pct2 = pct2['Offense_Std']
         
         offense_diff = abs(offense_pct1 - offense_pct2)
         sorted_offense = offense_diff.sort_values(ascending=False).index
@@ -571,6 +715,6 @@ def create_demographic_dashboard(df1: pd.DataFrame, df2: pd.DataFrame,
         leg.get_title().set_color('white')
 
         fig.suptitle("Crime Demographic Analysis:\nNYPD vs LAPD", fontsize=18, color='white', y=0.98)
-        plt.tight_layout(rect=[0, 0, 1, 0.96])
+        fig.tight_layout(rect=[0, 0, 1, 0.96])
         
         return fig
@@ -1,8 +1,46 @@
-import pytest
-import pandas as pd
+import os
+
 import numpy as np
-from src.standardize import clean_nypd_data, clean_lapd_data, convert_numeric_age_to_category, rename_nypd_columns, rename_lapd_columns
-from src.data_processing import standardize_age_categories, create_aligned_datasets
+import pandas as pd
+import pytest
+
+from src.aggregation import (
+    PARALLEL_COUNT_THRESHOLD,
+    count_by_key,
+    count_points_2d,
+    day_of_week,
+    summarize_temporal,
+    temporal_counts,
+)
+from src.data_processing import (
+    AGE_DTYPE,
+    GENDER_DTYPE,
+    OFFENSE_DTYPE,
+    RACE_DTYPE,
+    create_aligned_datasets,
+    filter_datasets_by_year_range,
+    slice_year_range,
+    sort_by_year,
+    standardize_age_categories,
+    standardize_all,
+    standardize_offense_categories,
+)
+from src.io import (
+    CACHE_SCHEMA_VERSION,
+    is_cache_valid,
+    load_data,
+    save_cache_metadata,
+    save_dataframe_to_parquet,
+)
+from src.standardize import (
+    LAPD_READ_OPTIONS,
+    clean_lapd_data,
+    clean_nypd_data,
+    convert_numeric_age_to_category,
+    rename_lapd_columns,
+    rename_nypd_columns,
+)
+
 
 @pytest.fixture
 def sample_nypd_df():
@@ -52,7 +90,8 @@ def test_clean_nypd_data(sample_nypd_df):
     cleaned = clean_nypd_data(renamed)
     assert cleaned['PD_Code'].isna().sum() == 0
     assert cleaned['Age_Group'].iloc[1] == 'UNKNOWN'
-    assert 'Arrest_Year' in cleaned.columns
+    assert cleaned['Offense_Category'].dtype == 'category'
+    assert cleaned['Arrest_Year'].dtype == np.int16
 
 def test_clean_lapd_data(sample_lapd_df):
     renamed = rename_lapd_columns(sample_lapd_df)
@@ -61,12 +100,75 @@ def test_clean_lapd_data(sample_lapd_df):
     assert pd.isna(cleaned['Age'].iloc[1])  # Negative age should be NaN
     assert 'Arrest_Year' in cleaned.columns
 
+def test_clean_lapd_data_drops_duplicate_report_ids(sample_lapd_df):
+    duplicated = pd.concat([sample_lapd_df, sample_lapd_df.iloc[[0]]], ignore_index=True)
+    duplicated.loc[2, 'Booking Time'] = 1400
+    cleaned = clean_lapd_data(rename_lapd_columns(duplicated))
+    assert cleaned['ID'].tolist() == [1, 2]
+
+def test_clean_lapd_data_fills_all_empty_text_column_from_csv(sample_lapd_df, tmp_path):
+    csv_path = tmp_path / 'sample_lapd.csv'
+    sample_lapd_df.assign(**{'Cross Street': np.nan, 'LAT': [34.0, 34.1], 'LON': [-118.2, -118.3]}).to_csv(
+        csv_path, index=False)
+
+    loaded = load_data(str(csv_path), **LAPD_READ_OPTIONS)
+    assert loaded['Cross Street'].dtype == 'string[pyarrow]'
+    assert loaded['Charge Description'].dtype == 'string[pyarrow]'
+    cleaned = clean_lapd_data(rename_lapd_columns(loaded))
+    assert cleaned['Cross_Street'].tolist() == ['Not Specified', 'Not Specified']
+
+def test_load_data_types_all_empty_columns_as_strings_without_schema(sample_lapd_df, tmp_path):
+    csv_path = tmp_path / 'lapd_export.csv'
+    # Export-style timestamps, which the pyarrow reader keeps as text
+    sample_lapd_df.assign(**{'Cross Street': np.nan, 'LAT': [34.0, 34.1], 'LON': [-118.2, -118.3],
+                             'Booking Date': ['01/01/2020 12:00:00 AM', np.nan]}).to_csv(csv_path, index=False)
+
+    loaded = load_data(str(csv_path))
+    assert loaded['Cross Street'].dtype == 'string[pyarrow]'
+    cleaned = clean_lapd_data(rename_lapd_columns(loaded))
+    assert cleaned['Cross_Street'].tolist() == ['Not Specified', 'Not Specified']
+
 def test_convert_numeric_age_to_category():
     assert convert_numeric_age_to_category(20) == '18-24'
     assert convert_numeric_age_to_category(10) == '<18'
     assert convert_numeric_age_to_category(-5) == 'UNKNOWN'
     assert convert_numeric_age_to_category(np.nan) == 'UNKNOWN'
 
+def test_standardize_age_categories_matches_scalar_conversion():
+    ages = pd.Series([10, 18, 24, 25, 44, 45, 64, 65, 90, -5, np.nan])
+    _, lapd = standardize_age_categories(None, pd.DataFrame({'Age': ages}))
+    expected = [convert_numeric_age_to_category(age) for age in ages]
+    assert lapd['Age_Category_Std'].tolist() == expected
+
+def test_standardized_columns_use_canonical_categories(sample_nypd_df, sample_lapd_df):
+    nypd = clean_nypd_data(rename_nypd_columns(sample_nypd_df))
+    lapd = clean_lapd_data(rename_lapd_columns(sample_lapd_df))
+    nypd, lapd = standardize_all(nypd, lapd)
+    expected = {'Gender_Std': GENDER_DTYPE, 'Race_Std': RACE_DTYPE,
+                'Age_Category_Std': AGE_DTYPE, 'Offense_Std': OFFENSE_DTYPE}
+    for df in (nypd, lapd):
+        for column, dtype in expected.items():
+            assert df[column].cat.categories.equals(dtype.categories)
+    assert lapd['Age_Category_Std'].tolist() == ['25-44', 'UNKNOWN']
+
+def test_canonical_categories_survive_parquet_round_trip(sample_nypd_df, sample_lapd_df, tmp_path):
+    nypd = clean_nypd_data(rename_nypd_columns(sample_nypd_df))
+    lapd = clean_lapd_data(rename_lapd_columns(sample_lapd_df))
+    nypd, _ = standardize_all(nypd, lapd)
+    nypd.loc[1, 'Race_Std'] = np.nan
+    path = str(tmp_path / 'nypd_processed.parquet')
+    save_dataframe_to_parquet(nypd, path)
+
+    loaded = load_data(path)
+    expected = {'Gender_Std': GENDER_DTYPE, 'Race_Std': RACE_DTYPE,
+                'Age_Category_Std': AGE_DTYPE, 'Offense_Std': OFFENSE_DTYPE}
+    for column, dtype in expected.items():
+        # Same dtype means the dashboard counts the stored codes directly
+        assert loaded[column].dtype == dtype
+        assert loaded[column].cat.categories.equals(dtype.categories)
+        assert loaded[column].isna().tolist() == nypd[column].isna().tolist()
+        assert loaded[column].dropna().tolist() == nypd[column].dropna().tolist()
+
 def test_create_aligned_datasets():
     # Create minimal dataframes for alignment
     nypd = pd.DataFrame({
@@ -88,3 +190,259 @@ def test_create_aligned_datasets():
     assert 'Data_Source' in nypd_aligned.columns
     assert nypd_aligned['Data_Source'].iloc[0] == 'NYPD'
     assert lapd_aligned['Data_Source'].iloc[0] == 'LAPD'
+
+def test_load_data_prefers_sibling_parquet(tmp_path):
+    csv_path = tmp_path / 'aligned.csv'
+    pd.DataFrame({'Arrest_Year': [2019]}).to_csv(csv_path, index=False)
+    save_dataframe_to_parquet(pd.DataFrame({'Arrest_Year': [2020]}), str(tmp_path / 'aligned.parquet'))
+
+    loaded = load_data(str(csv_path))
+    assert loaded['Arrest_Year'].iloc[0] == 2020
+
+def test_cache_invalidated_when_source_changes(tmp_path):
+    source = tmp_path / 'sample_nypd.csv'
+    source.write_text('Arrest_Year\n2020\n')
+    meta_path = str(tmp_path / 'processed_cache.json')
+
+    assert not is_cache_valid(meta_path, [str(source)])
+    save_cache_metadata(meta_path, [str(source)])
+    assert is_cache_valid(meta_path, [str(source)])
+
+    os.utime(source, (0, 0))
+    assert not is_cache_valid(meta_path, [str(source)])
+
+def test_cache_invalidated_when_schema_version_changes(tmp_path, monkeypatch):
+    source = tmp_path / 'sample_nypd.csv'
+    source.write_text('Arrest_Year\n2020\n')
+    meta_path = str(tmp_path / 'processed_cache.json')
+    save_cache_metadata(meta_path, [str(source)])
+    assert is_cache_valid(meta_path, [str(source)])
+
+    monkeypatch.setattr('src.io.CACHE_SCHEMA_VERSION', CACHE_SCHEMA_VERSION + 1)
+    assert not is_cache_valid(meta_path, [str(source)])
+
+def test_filter_datasets_by_year_range_drops_non_overlapping_years():
+    nypd = pd.DataFrame({'Arrest_Year': [2009, 2010, 2011, 2012, 2013]})
+    lapd = pd.DataFrame({'Arrest_Year': [2010, 2012, 2013, 2014, np.nan]})
+
+    nypd_filtered, lapd_filtered = filter_datasets_by_year_range(nypd, lapd)
+
+    assert nypd_filtered['Arrest_Year'].tolist() == [2010, 2012, 2013]
+    assert lapd_filtered['Arrest_Year'].tolist() == [2010, 2012, 2013]
+
+def test_count_by_key_ignores_missing_and_out_of_range_keys():
+    keys = np.array([1, 2, 2, 12, 13, -1, np.nan])
+    counts = count_by_key(keys, 13)
+    assert counts.tolist() == [0, 1, 2, 0, 0, 0, 0, 0, 0, 0, 0, 0, 1]
+
+def test_count_by_key_parallel_matches_bincount():
+    pytest.importorskip('numba')
+    rng = np.random.default_rng(0)
+    keys = rng.integers(-2, 40, PARALLEL_COUNT_THRESHOLD + 1)
+    weights = rng.integers(0, 5, len(keys))
+    in_range = (keys >= 0) & (keys < 32)
+
+    expected = np.bincount(keys[in_range], minlength=32)
+    expected_weighted = np.bincount(keys[in_range], weights=weights[in_range], minlength=32)
+    assert count_by_key(keys, 32).tolist() == expected.tolist()
+    assert count_by_key(keys, 32, weights).tolist() == expected_weighted.astype(np.int64).tolist()
+
+def test_offense_categories_keep_first_keyword_precedence():
+    descriptions = ['dangerous weapons; burglary', 'Felony Assault', None, 'LOITERING']
+    nypd = pd.DataFrame({'Offense_Category': pd.Series(descriptions, dtype='string[pyarrow]')})
+    lapd = pd.DataFrame({'Charge_Group_Description': pd.Series(descriptions, dtype=object)})
+
+    nypd_std, lapd_std = standardize_offense_categories(nypd, lapd)
+
+    assert nypd_std['Offense_Std'].tolist() == ['Property Crime', 'Violent Crime', 'Other', 'Other']
+    assert lapd_std['Offense_Std'].tolist() == ['Property Crime', 'Violent Crime', 'Other', 'Other']
+
+def test_slice_year_range_matches_mask_filter():
+    df = pd.DataFrame({'Arrest_Year': pd.array([2014, None, 2010, 2012, 2010, 2016], dtype='Int16')})
+    sorted_df = sort_by_year(df)
+
+    sliced = slice_year_range(sorted_df, 2010, 2014)
+    expected = df[(df['Arrest_Year'] >= 2010) & (df['Arrest_Year'] <= 2014)]
+
+    assert sorted(sliced.index) == sorted(expected.index)
+    assert sliced['Arrest_Year'].tolist() == [2010, 2010, 2012, 2014]
+
+@pytest.mark.parametrize('year_dtype', [np.int16, 'int16[pyarrow]', 'float64'])
+def test_slice_year_range_searches_native_year_dtypes(year_dtype):
+    df = pd.DataFrame({'Arrest_Year': pd.array([2009, 2010, 2010, 2013, 2016], dtype=year_dtype)})
+
+    assert slice_year_range(df, 2010, 2014)['Arrest_Year'].tolist() == [2010, 2010, 2013]
+    assert slice_year_range(df, 2017, 2020).empty
+
+def test_sort_by_year_keeps_year_ordered_frames():
+    df = pd.DataFrame({'Arrest_Year': pd.array([2010, 2012, 2012, None], dtype='int16[pyarrow]')})
+    assert sort_by_year(df) is df
+
+    unsorted = df.iloc[[1, 3, 0, 2]]
+    assert sort_by_year(unsorted).index.tolist() == [0, 1, 2, 3]
+
+def test_summarize_temporal_counts_arrests_per_date():
+    df = pd.DataFrame({'Arrest_Year': [2020, 2020, 2021, 2020],
+                       'Arrest_Month': [1, 1, 2, 3],
+                       'Arrest_Day': [5, 5, 9, 1]})
+    summary = summarize_temporal(df)
+
+    assert summary['Arrest_Count'].tolist() == [2, 1, 1]
+    months = count_by_key(summary['Arrest_Month'].to_numpy(), 13, summary['Arrest_Count'].to_numpy())
+    assert months.tolist() == count_by_key(df['Arrest_Month'].to_numpy(), 13).tolist()
+
+def test_day_of_week_matches_pandas_and_flags_invalid_dates():
+    years = np.array([2020, 2019, 2024, 2023, np.nan])
+    months = np.array([1, 12, 2, 2, 5])
+    days = np.array([1, 31, 29, 29, 1])
+
+    # 2020-01-01 was a Wednesday; 2023-02-29 does not exist
+    assert day_of_week(years, months, days).tolist() == [2, 1, 3, -1, -1]
+
+def test_temporal_counts_match_for_dataset_and_summary():
+    df = pd.DataFrame({'Arrest_Year': [2019, 2019, 2021, np.nan],
+                       'Arrest_Month': [1, 1, 12, np.nan],
+                       'Arrest_Day': [7, 7, 31, np.nan]})
+    counts = temporal_counts(df)
+    summary_counts = temporal_counts(summarize_temporal(df))
+
+    assert counts['first_year'] == 2019
+    assert counts['year'].tolist() == [2, 0, 1]
+    assert counts['weekday'].tolist() == [2, 0, 0, 0, 1, 0, 0]
+    for key in ['year', 'month', 'day', 'weekday']:
+        assert counts[key].tolist() == summary_counts[key].tolist()
+
+def test_count_points_2d_matches_histogram2d():
+    x = np.array([0.0, 0.5, 1.0, 1.5, 2.0, np.nan, -0.1])
+    y = np.array([0.0, 1.9, 2.0, 0.2, 1.0, 1.0, 1.0])
+    expected, _, _ = np.histogram2d(x, y, bins=(4, 2), range=[(0, 2), (0, 2)])
+    counts = count_points_2d(x, y, (0, 2), (0, 2), bins=(4, 2))
+    assert counts.tolist() == expected.tolist()
+
+def test_count_points_2d_parallel_matches_histogram2d():
+    pytest.importorskip('numba')
+    rng = np.random.default_rng(0)
+    x = rng.uniform(-0.5, 2.5, PARALLEL_COUNT_THRESHOLD + 1)
+    y = rng.uniform(-0.5, 2.5, len(x))
+    expected, _, _ = np.histogram2d(x, y, bins=(30, 20), range=[(0, 2), (0, 2)])
+    counts = count_points_2d(x, y, (0, 2), (0, 2), bins=(30, 20))
+    assert counts.tolist() == expected.tolist()
+    assert count_points_2d(x.astype(np.float32), y.astype(np.float32),
+                           (0, 2), (0, 2), bins=(30, 20)).sum() == expected.sum()
+
+@pytest.fixture
+def demographics_df():
+    return pd.DataFrame({
+        'Race_Std': pd.Categorical(['Black', 'White', 'Black', np.nan, 'Other'], dtype=RACE_DTYPE),
+        'Gender_Std': pd.Categorical(['Male', 'Female', 'Male', 'Unknown', np.nan], dtype=GENDER_DTYPE),
+        'Age_Category_Std': pd.Categorical(['25-44', '<18', '65+', '25-44', 'UNKNOWN'], dtype=AGE_DTYPE),
+        'Offense_Std': pd.Categorical(['Other', 'Drug Offense', np.nan, 'Other', 'Violent Crime'],
+                                      dtype=OFFENSE_DTYPE),
+    })
+
+def expected_demographic_percentages(df, dtypes):
+    # Labels outside the canonical categories are dropped by the reindex but
+    # still count toward the total
+    return {column: df[column].astype(object).value_counts().reindex(dtype.categories, fill_value=0)
+            / len(df) * 100 for column, dtype in dtypes.items()}
+
+def assert_demographic_percentages(percentages, expected):
+    assert percentages.keys() == expected.keys()
+    for column, series in expected.items():
+        assert percentages[column].index.equals(series.index)
+        np.testing.assert_allclose(percentages[column].to_numpy(), series.to_numpy())
+
+def test_demographic_percentages_for_canonical_categoricals(demographics_df):
+    pytest.importorskip('contextily')
+    from src.visualization import DEMOGRAPHIC_DTYPES, demographic_percentages
+
+    percentages = demographic_percentages(demographics_df)
+    assert_demographic_percentages(percentages, expected_demographic_percentages(demographics_df, DEMOGRAPHIC_DTYPES))
+    assert percentages['Race_Std']['Black'] == 40.0
+
+def test_demographic_percentages_for_categoricals_loaded_from_parquet(demographics_df, tmp_path):
+    pytest.importorskip('contextily')
+    from src.visualization import DEMOGRAPHIC_DTYPES, demographic_percentages
+
+    path = str(tmp_path / 'demographics.parquet')
+    save_dataframe_to_parquet(demographics_df, path)
+    loaded = load_data(path)
+
+    assert_demographic_percentages(demographic_percentages(loaded),
+                                   expected_demographic_percentages(demographics_df, DEMOGRAPHIC_DTYPES))
+
+@pytest.mark.parametrize('string_dtype', [object, 'string[pyarrow]'])
+def test_demographic_percentages_for_string_columns(demographics_df, string_dtype):
+    pytest.importorskip('contextily')
+    from src.visualization import DEMOGRAPHIC_DTYPES, demographic_percentages
+
+    strings = demographics_df.astype(string_dtype)
+
+    assert_demographic_percentages(demographic_percentages(strings),
+                                   expected_demographic_percentages(demographics_df, DEMOGRAPHIC_DTYPES))
+
+def test_demographic_percentages_ignore_labels_outside_canonical_categories(demographics_df):
+    pytest.importorskip('contextily')
+    from src.visualization import DEMOGRAPHIC_DTYPES, demographic_percentages
+
+    # Both as strings and as a categorical with extra categories
+    demographics_df['Race_Std'] = demographics_df['Race_Std'].astype(object)
+    demographics_df.loc[[1, 3], 'Race_Std'] = 'Martian'
+    demographics_df['Gender_Std'] = pd.Categorical(['Male', 'X', 'Male', 'Unknown', np.nan],
+                                                   categories=['X', 'Unknown', 'Male'])
+
+    percentages = demographic_percentages(demographics_df)
+    assert_demographic_percentages(percentages, expected_demographic_percentages(demographics_df, DEMOGRAPHIC_DTYPES))
+    assert percentages['Race_Std'].tolist() == [40.0, 0.0, 0.0, 0.0, 0.0, 20.0, 0.0]
+    assert percentages['Gender_Std'].tolist() == [40.0, 0.0, 20.0]
+
+def test_calculate_density_matches_gaussian_kde():
+    pytest.importorskip('contextily')
+    from scipy.stats import gaussian_kde
+
+    from src.visualization import calculate_density
+
+    rng = np.random.default_rng(0)
+    # Independent axes, since the FFT kernel has no cross-covariance term
+    x = np.concatenate([rng.normal(0, 1, 300), rng.normal(4, 0.5, 200)])
+    y = rng.normal(0, 2, len(x))
+    densities, densities_norm = calculate_density(x, y)
+    expected = gaussian_kde(np.vstack([x, y]))(np.vstack([x, y]))
+
+    assert np.corrcoef(densities, expected)[0, 1] > 0.9999
+    assert np.median(densities / expected) == pytest.approx(1, abs=0.01)
+    assert densities_norm.min() == 0 and densities_norm.max() == 1
+
+def test_calculate_density_falls_back_without_spread_in_both_directions():
+    pytest.importorskip('contextily')
+    from src.visualization import calculate_density
+
+    y = np.linspace(34.0, 34.3, 50)
+    assert calculate_density(np.full(50, -118.2), y) == (None, None)
+    assert calculate_density(y, np.full(50, 34.0)) == (None, None)
+    assert calculate_density(y[:10], y[:10]) == (None, None)
+
+def test_linear_trend_matches_polyfit():
+    pytest.importorskip('contextily')
+    from src.visualization import linear_trend
+
+    x = np.arange(8, dtype=float)
+    y = np.array([120.0, 0.0, 95.0, 130.0, np.nan, 0.0, 160.0, 151.0])
+    known = np.isfinite(y)
+    slope, intercept = np.polyfit(x[known], y[known], 1)
+
+    trend = linear_trend(x, y)
+    np.testing.assert_allclose(trend, slope * x + intercept)
+    np.testing.assert_allclose(linear_trend(x, np.nan_to_num(y)), np.polyval(np.polyfit(x, np.nan_to_num(y), 1), x))
+
+def test_get_figure_axes_keeps_new_figures_out_of_pyplot():
+    pytest.importorskip('contextily')
+    import matplotlib.pyplot as plt
+
+    from src.visualization import get_figure_axes
+
+    open_figures = plt.get_fignums()
+    fig, axes = get_figure_axes(None, 2, 2, figsize=(4, 3))
+    assert plt.get_fignums() == open_figures
+    assert axes.shape == (4,)
+    assert get_figure_axes(fig, 2, 2)[0] is fig